@@ -1,40 +1,231 @@
 import random
-from go_game_mcts import MCTSNode, mcts
-from go_game_rules import is_suicide
+import time
+from go_game_compact_tree import CompactTree
+from go_game_constants import EMPTY
+from go_game_fast_board import FastBoard
+from go_game_instrumentation import SearchStats
+from go_game_mcts import CHECK_INTERVAL, MCTSNode, detach_subtree, find_subtree, mcts, playout_engine, seed_search
+from go_game_opening_book import OpeningBook
+from go_game_parallel import ROOT_PARALLEL, parallel_search
+from go_game_solver import SOLVER_EMPTY_POINTS, EndgameSolver
+from go_game_transposition import DEFAULT_TABLE_SIZE, TranspositionTable
+
+# Time management
+SAFETY_MARGIN = 0.1      # Fraction of the clock never planned for
+MIN_MOVES_LEFT = 5       # Always plan for at least this many more own moves
+MAX_CLOCK_FRACTION = 0.25  # Never spend more than this share of the clock on one move
+MIN_MOVE_TIME = 0.05     # Seconds; enough for a few iterations
+
+# Worker seeds of a parallel search without a fixed seed are drawn below this
+PARALLEL_SEED_RANGE = 2 ** 31
+
+# Nodes the endgame solver may spend on the root position before the move is searched instead
+ROOT_SOLVER_NODES = 50000
+# Share of a timed move the root solve may use; the search gets the rest if the solve gives up
+ROOT_SOLVER_TIME_SHARE = 0.5
+
+
+def allocate_move_time(time_left, board):
+    """
+    Split the remaining clock over the expected rest of the game. Each side plays
+    roughly every other empty point, so the empty points left estimate the number
+    of moves still to come; a safety margin is kept back for overhead.
+    """
+    empty_points = sum(row.count(EMPTY) for row in board)
+    moves_left = max(MIN_MOVES_LEFT, empty_points // 2)
+    budget = time_left * (1 - SAFETY_MARGIN) / moves_left
+    return max(MIN_MOVE_TIME, min(budget, time_left * MAX_CLOCK_FRACTION))
+
+
+def move_stats(root_visits, move, seconds):
+    """
+    Statistics of one move for a game record (go_game_records): the search time,
+    the root visits and the chosen move's win rate, from {move: (visits, wins)}.
+    """
+    stats = {"seconds": seconds}
+    if root_visits:
+        stats["visits"] = sum(visits for visits, _ in root_visits.values())
+        if move in root_visits:
+            visits, wins = root_visits[move]
+            stats["winrate"] = wins / visits if visits else 0.0
+    return stats
 
 
 class GoAI:
-    def __init__(self, board_size, simulations=100):
+    """
+    Picks moves by MCTS, with the opening book and the endgame solver in front of
+    the search.
+
+    batch_size plays leaves out in NumPy batches (go_game_batch_playout). That
+    only pays off at large batch sizes: on 7x7 a batch of 64 runs about 500
+    playouts/sec against about 3200 for the scalar engine, and the two break even
+    near 1024. Batch mode cannot be combined with rave or instrument, and the
+    endgame solver then only runs at the root.
+    """
+
+    def __init__(self, board_size, simulations=100, batch_size=None, workers=1, parallel_mode=ROOT_PARALLEL,
+                 seed=None, max_move_time=None, reuse_tree=True, table_size=DEFAULT_TABLE_SIZE, node_budget=None,
+                 instrument=False, trace=False, rave=False, book_path=None, solver_empty=SOLVER_EMPTY_POINTS,
+                 komi=6.5):
+        if batch_size and (rave or instrument or trace):
+            raise ValueError("batch_size cannot be combined with rave or instrumentation")
         self.board_size = board_size
-        self.simulations = simulations
+        self.komi = komi  # Komi the playouts and the endgame solver score with
+        self.simulations = simulations  # Iterations per move when no time budget is given
+        self.max_move_time = max_move_time  # Upper bound in seconds for clock-based moves
+        self.batch_size = batch_size  # Play leaves out in NumPy batches of this size
+        self.workers = workers  # Search processes; more than one uses go_game_parallel
+        self.parallel_mode = parallel_mode
+        self.seed = seed  # Fixed seed for reproducible moves, None for a random search
+        self.reuse_tree = reuse_tree  # Keep the search tree between moves
+        self.rave = rave  # Blend all-moves-as-first statistics into selection (object tree only)
+        self.node_budget = node_budget  # Search a CompactTree with this many node slots instead of MCTSNode objects
+        # Collect a SearchStats for every in-process object-tree move; trace also keeps per-phase spans
+        self.instrument = instrument or trace
+        self.trace = trace
+        self.last_stats = None
+        self.last_move_stats = None  # move_stats of the last get_move, for game records
+        self._executor = None
+        self._root = None
+        # Shares nodes between move orders reaching the same position; None disables it
+        self._table = TranspositionTable(table_size) if table_size else None
+        # Memory-mapped opening book (go_game_opening_book); a position found in it is answered without searching
+        self.book = OpeningBook(book_path) if book_path else None
+        # Positions with at most solver_empty empty points are solved exactly, at the root and at search leaves
+        self.solver = EndgameSolver(komi, solver_empty) if solver_empty else None
+
+    def get_move(self, board, player_color, time_left=None, move_time=None):
+        """
+        Return the best move for player_color, or None to pass.
+
+        :param time_left: seconds left on the AI's clock; the move gets a share of it
+        :param move_time: fixed seconds for this move (takes precedence over time_left)
+        Without either, a fixed number of simulations is run.
+        """
+        # Search on an array-backed copy so legal moves come from liberty counts
+        # and the caller's board is never touched
+        board = self._search_board(board)
+        start = time.perf_counter()
+        playout_engine.komi = self.komi  # The rollout engine is shared by every GoAI in the process
+
+        if self.book is not None:
+            move = self.book.best_move(board, player_color)
+            if move is not None:
+                self.last_move_stats = move_stats(None, move, time.perf_counter() - start)
+                return move
+
+        deadline = None
+        iterations = self.simulations
+        if move_time is None and time_left is not None:
+            move_time = allocate_move_time(time_left, board)
+            if self.max_move_time is not None:
+                move_time = min(move_time, self.max_move_time)
+        if move_time is not None:
+            deadline = time.time() + move_time
+            iterations = None
+
+        if self.solver is not None and self.solver.can_solve(board):
+            solver_deadline = None if deadline is None else time.time() + move_time * ROOT_SOLVER_TIME_SHARE
+            solved = self.solver.best_move(board, player_color, ROOT_SOLVER_NODES, solver_deadline)
+            if solved is not None:
+                # A proven score-optimal move, which may be a pass (None)
+                move = solved[0]
+                self.last_move_stats = move_stats(None, move, time.perf_counter() - start)
+                return move
+
+        if self.workers > 1:
+            if self._executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            # Without a fixed seed every move draws new worker seeds, so the searches differ from move to move
+            seed = self.seed if self.seed is not None else random.randrange(PARALLEL_SEED_RANGE)
+            move, merged = parallel_search(board, player_color, iterations, self.workers, self.parallel_mode,
+                                           seed, self._executor, deadline=deadline, komi=self.komi)
+            self.last_move_stats = move_stats(merged, move, time.perf_counter() - start)
+            return move
 
-    def get_move(self, board, player_color):
-        # Create the root node from the current board state
-        root = MCTSNode(board, player_color)
+        if self.seed is not None:
+            seed_search(self.seed)
+        if self.node_budget:
+            # The array tree is rebuilt for every move and does not use the transposition table
+            tree = CompactTree(board, player_color, self.node_budget)
+            move = tree.search(iterations, deadline, self.solver)
+            self.last_move_stats = move_stats(tree.child_stats(), move, time.perf_counter() - start)
+            return move
+        root = self._prepare_root(board, player_color)
 
-        # Perform MCTS simulation to get the best move
-        best_move = None
-        for _ in range(self.simulations):
-            # Perform MCTS for each simulation
-            node = root
-            while node.children and not node.untried_moves:
-                node = node.best_child()
+        # Perform MCTS simulation and return the most visited move (None means pass)
+        stats = SearchStats(self.trace) if self.instrument else None
+        move = mcts(root, iter_limit=iterations, batch_size=self.batch_size, deadline=deadline, table=self._table,
+                    stats=stats, rave=self.rave, solver=None if self.batch_size else self.solver)
+        self.last_move_stats = move_stats(root.child_stats(), move, time.perf_counter() - start)
+        if stats is not None:
+            self.last_stats = stats
+        return move
 
-            # Expand the node if there are untried moves
-            if node.untried_moves:
-                node = node.expand()
+    def ponder(self, board, player_color, stop_event):
+        """
+        Search the position with the opponent (player_color) to move until
+        stop_event is set. The tree is kept, so when the opponent plays one of the
+        replies searched here, the next get_move continues from its subtree.
+        Only the in-process search can ponder.
+        """
+        if self.workers > 1 or not self.reuse_tree:
+            return
+        root = self._prepare_root(self._search_board(board), player_color)
+        playout_engine.komi = self.komi
+        while not stop_event.is_set() and (root.untried_moves or root.children):
+            mcts(root, iter_limit=CHECK_INTERVAL, table=self._table, rave=self.rave, solver=self.solver)
 
-            # Rollout to simulate a random game from this node
-            result = node.rollout()
+    def _search_board(self, board):
+        """Return a FastBoard copy of the caller's board for the search to own"""
+        if isinstance(board, FastBoard):
+            return board.copy()
+        return FastBoard.from_list(board)
 
-            # Backpropagate the result of the simulation
-            node.backpropagate(result)
+    def _prepare_root(self, board, player_color):
+        """
+        Continue from the subtree of the previous search that matches this position
+        (usually the reply to our last move); otherwise start a new tree. The root
+        node's untried moves are already the legal moves, so nothing is re-checked.
+        """
+        root = None
+        if self.reuse_tree and self._root is not None:
+            root = find_subtree(self._root, board.hash, player_color)
+        if root is None:
+            root = MCTSNode(board, player_color)
+            if self._table is not None:
+                self._table.clear()  # Nothing in the old tree can be reached any more
+        else:
+            # Release the rest of the old tree: the kept nodes must not point into it, nor may the table
+            nodes = detach_subtree(root)
+            if self._table is not None:
+                self._table.retain(nodes)
+            board.history |= root.board.history  # A fresh board may not carry the earlier positions
+            root.board = board
+        self._root = root if self.reuse_tree else None
+        return root
 
-        # Check for suicide and avoid it
-        legal_moves = [move for move in root.get_legal_moves() if not is_suicide(board, move[0], move[1], player_color)]
+    def set_komi(self, komi):
+        """Score searches with a new komi; statistics gathered under the old one are dropped"""
+        if komi != self.komi:
+            self.komi = komi
+            if self.solver is not None:
+                self.solver.komi = komi
+                self.solver.clear()
+            self.new_game()
 
-        if legal_moves:
-            # If there are any legal moves, pick one of them
-            best_move = random.choice(legal_moves)
+    def new_game(self):
+        """Forget the search tree kept from the previous game"""
+        self._root = None
+        if self._table is not None:
+            self._table.clear()
 
-        return best_move
+    def close(self):
+        """Shut down the worker processes of a parallel search and release the opening book"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
@@ -0,0 +1,209 @@
+# go_game_arena.py
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from go_game_constants import BOARD_SIZE, BLACK, WHITE
+from go_game_ai import GoAI
+from go_game_records import open_writer
+from go_game_state import GoGame
+
+# Config that plays a uniformly random legal move instead of searching
+RANDOM_POLICY = "random"
+
+Z_95 = 1.96  # Normal quantile for 95% confidence intervals
+
+
+class IllegalMoveError(Exception):
+    """A player returned a move that is not legal in the game position"""
+
+
+class RandomPlayer:
+    """Baseline policy: a uniformly random legal move, passing only when none is left"""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def get_move(self, board, player_color, time_left=None, move_time=None):
+        moves = board.legal_moves(player_color)
+        return self.rng.choice(moves) if moves else None
+
+    def close(self):
+        pass
+
+
+def make_player(config, board_size, seed, komi=6.5):
+    """
+    Build a player from a config: RANDOM_POLICY, or a dict of GoAI keyword
+    arguments. A GoAI without its own seed gets the game's seed so games repeat,
+    and searches with the game's komi.
+    """
+    if config == RANDOM_POLICY:
+        return RandomPlayer(seed)
+    options = dict(config)
+    options.setdefault("seed", seed)
+    options.setdefault("komi", komi)
+    return GoAI(board_size=board_size, **options)
+
+
+def play_game(black, white, seed=0, board_size=BOARD_SIZE, komi=6.5, move_time=None, max_moves=None):
+    """
+    Play one game between two configs without a GUI and return a dict with the
+    winner (BLACK, WHITE or None for a draw), both scores, the number of moves and
+    the seconds and moves each color spent. The game ends after two passes in a
+    row or max_moves moves (default 3 * size * size). An illegal move is an engine
+    bug and raises IllegalMoveError rather than being played as a pass.
+    The dict also holds the GameRecord of the game, with the search statistics
+    of every move a GoAI played.
+    """
+    players = {BLACK: make_player(black, board_size, seed * 2, komi),
+               WHITE: make_player(white, board_size, seed * 2 + 1, komi)}
+    game = GoGame(board_size, komi)
+    max_moves = max_moves or 3 * board_size * board_size
+    thinking = {BLACK: 0.0, WHITE: 0.0}
+    counts = {BLACK: 0, WHITE: 0}
+    try:
+        while not game.is_over() and len(game.moves) < max_moves:
+            color = game.current_player
+            start = time.perf_counter()
+            move = players[color].get_move(game.board, color, move_time=move_time)
+            thinking[color] += time.perf_counter() - start
+            counts[color] += 1
+            stats = getattr(players[color], "last_move_stats", None)
+            if move is None:
+                game.pass_move(stats)
+            elif not game.play(*move, stats=stats)[0]:
+                raise IllegalMoveError(f"{'black' if color == BLACK else 'white'} ({players[color].__class__.__name__})"
+                                       f" played illegal move {move} at move {len(game.moves) + 1} of game seed {seed}")
+    finally:
+        for player in players.values():
+            player.close()
+
+    black_score, white_score = game.score()
+    return {"winner": game.winner(), "black_score": black_score, "white_score": white_score,
+            "moves": len(game.moves),
+            "black_time": thinking[BLACK], "white_time": thinking[WHITE],
+            "black_moves": counts[BLACK], "white_moves": counts[WHITE],
+            "record": game.finish_record(str(black), str(white))}
+
+
+def _play_pairing(args):
+    """Worker: play game number i with the colors alternating, seen from config a"""
+    config_a, config_b, i, seed, kwargs = args
+    a_is_black = i % 2 == 0
+    black, white = (config_a, config_b) if a_is_black else (config_b, config_a)
+    game = play_game(black, white, seed=seed + i, **kwargs)
+    a_color, b_color = (BLACK, WHITE) if a_is_black else (WHITE, BLACK)
+    prefix = {BLACK: "black", WHITE: "white"}
+    return {"a_won": game["winner"] == a_color, "b_won": game["winner"] == b_color,
+            "a_time": game[prefix[a_color] + "_time"], "a_moves": game[prefix[a_color] + "_moves"],
+            "b_time": game[prefix[b_color] + "_time"], "b_moves": game[prefix[b_color] + "_moves"],
+            "moves": game["moves"], "record": game["record"]}
+
+
+def check_legal_self_play(config, games=6, seed=0, **kwargs):
+    """
+    Regression check: play config against itself and return the number of moves
+    played. play_game raises IllegalMoveError on the first illegal move. The
+    default GoAI keeps its tree between moves and shares nodes through the
+    transposition table, where a wrong edge move once produced occupied points.
+    """
+    return sum(play_game(config, config, seed=seed + i, **kwargs)["moves"] for i in range(games))
+
+
+def wilson_interval(wins, games, z=Z_95):
+    """Wilson score interval for a win rate; stays inside [0, 1] even for 0 or all wins"""
+    if games == 0:
+        return 0.0, 1.0
+    p = wins / games
+    denominator = 1 + z * z / games
+    centre = (p + z * z / (2 * games)) / denominator
+    spread = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, centre - spread), min(1.0, centre + spread)
+
+
+def elo_difference(score):
+    """Elo difference implied by an expected score (draws count half); infinite at 0 or 1"""
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def run_match(config_a, config_b, games=20, workers=1, seed=0, record_path=None, **kwargs):
+    """
+    Play games between config_a and config_b, alternating colors, and return the
+    match statistics as a dict. With workers > 1 the games run in parallel
+    processes; every game has a fixed seed, so the outcome does not depend on the
+    worker count. With record_path, every game is appended to that file (SGF for
+    a .sgf path, binary records otherwise). Extra keyword arguments go to play_game.
+    """
+    jobs = [(config_a, config_b, i, seed, kwargs) for i in range(games)]
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_play_pairing, jobs))
+    else:
+        results = [_play_pairing(job) for job in jobs]
+    elapsed = time.perf_counter() - start
+    if record_path:
+        with open_writer(record_path) as writer:
+            for r in results:
+                writer.write(r["record"])
+
+    wins = sum(r["a_won"] for r in results)
+    losses = sum(r["b_won"] for r in results)
+    draws = games - wins - losses
+    score = (wins + 0.5 * draws) / games if games else 0.5
+    low, high = wilson_interval(wins + 0.5 * draws, games)
+    return {"games": games, "a_wins": wins, "b_wins": losses, "draws": draws,
+            "a_win_rate": score, "a_win_rate_ci": (low, high),
+            "elo": elo_difference(score), "elo_ci": (elo_difference(low), elo_difference(high)),
+            "games_per_second": games / elapsed if elapsed > 0 else math.inf,
+            "a_seconds_per_move": sum(r["a_time"] for r in results) / max(1, sum(r["a_moves"] for r in results)),
+            "b_seconds_per_move": sum(r["b_time"] for r in results) / max(1, sum(r["b_moves"] for r in results)),
+            "moves_per_game": sum(r["moves"] for r in results) / games if games else 0.0,
+            "seconds": elapsed}
+
+
+def format_match(result, name_a="A", name_b="B"):
+    """Return a short text report of run_match's result"""
+    low, high = result["a_win_rate_ci"]
+    elo_low, elo_high = result["elo_ci"]
+    return "\n".join([
+        f"{name_a} vs {name_b}: +{result['a_wins']} -{result['b_wins']} ={result['draws']} "
+        f"in {result['games']} games",
+        f"{name_a} win rate: {result['a_win_rate']:.3f} (95% CI {low:.3f} - {high:.3f})",
+        f"Elo difference: {result['elo']:+.0f} (95% CI {elo_low:+.0f} - {elo_high:+.0f})",
+        f"{result['games_per_second']:.2f} games/sec, {result['moves_per_game']:.1f} moves/game",
+        f"Seconds per move: {name_a} {result['a_seconds_per_move']:.4f}, {name_b} {result['b_seconds_per_move']:.4f}",
+    ])
+
+
+def _config(simulations):
+    return RANDOM_POLICY if simulations == 0 else {"simulations": simulations}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play GoAI configurations against each other without a GUI")
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=int, default=BOARD_SIZE)
+    parser.add_argument("--a", type=int, default=100, help="simulations per move for A (0 plays randomly)")
+    parser.add_argument("--b", type=int, default=0, help="simulations per move for B (0 plays randomly)")
+    parser.add_argument("--record", help="append the games to this file (.sgf for SGF, else binary records)")
+    parser.add_argument("--check-legal", action="store_true", help="only play A against itself and check every move")
+    args = parser.parse_args()
+    if args.check_legal:
+        moves = check_legal_self_play(_config(args.a), args.games, args.seed, board_size=args.size)
+        print(f"{moves} moves in {args.games} self-play games, all legal")
+        sys.exit()
+    match = run_match(_config(args.a), _config(args.b), args.games, args.workers, args.seed, record_path=args.record,
+                      board_size=args.size)
+    print(format_match(match, f"A({args.a})", f"B({args.b})"))
@@ -0,0 +1,76 @@
+# go_game_background_ai.py
+
+import threading
+
+
+class BackgroundAI:
+    """
+    Runs a GoAI on a background thread so the pygame loop keeps drawing while it
+    thinks. request_move starts a search and poll returns the move once it is
+    ready. Between AI moves, start_pondering keeps the engine searching the
+    position with the human to move; the tree is reused by the next request.
+
+    Only one thread runs at a time: a request first stops any pondering, and the
+    GoAI is never touched from the caller's thread while a search is running.
+    """
+
+    def __init__(self, ai):
+        self.ai = ai
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._result = None
+        self._ready = False
+        self._pondering = False
+
+    def request_move(self, board, player_color, time_left=None):
+        """Start searching for player_color's move on a private copy of the board"""
+        self.stop()
+        board = board.copy()
+        self._ready = False
+        self._result = None
+        self._pondering = False
+
+        def search():
+            self._result = self.ai.get_move(board, player_color, time_left=time_left)
+            self._ready = True
+
+        self._thread = threading.Thread(target=search, daemon=True)
+        self._thread.start()
+
+    def poll(self):
+        """Return (ready, move); move is the search result (None means pass) once ready is True"""
+        if not self._ready:
+            return False, None
+        self._thread.join()
+        self._thread = None
+        self._ready = False
+        return True, self._result
+
+    def is_thinking(self):
+        """True while a move search (not pondering) is running or its result has not been polled"""
+        return self._thread is not None and not self._pondering
+
+    def start_pondering(self, board, player_to_move):
+        """Search the position while player_to_move (the human) thinks, until the next request or stop"""
+        self.stop()
+        board = board.copy()
+        self._stop_event = threading.Event()
+        self._pondering = True
+        self._thread = threading.Thread(target=self.ai.ponder, args=(board, player_to_move, self._stop_event),
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop pondering, or wait for a running move search to finish"""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+            self._ready = False
+            self._pondering = False
+
+    def close(self):
+        """Stop pondering and release the engine; a move search still running is left to finish on its own"""
+        if self._pondering:
+            self.stop()
+        self.ai.close()
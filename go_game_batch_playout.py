@@ -0,0 +1,295 @@
+# go_game_batch_playout.py
+
+import time
+import numpy as np
+from go_game_constants import EMPTY, BLACK, WHITE
+
+# Bit-plane word type; boards are packed 64 to a word, little-endian so that
+# np.unpackbits(..., bitorder="little") returns them in order
+PLANE = np.dtype("<u8")
+
+# How many times a board may resample after drawing a suicide point before it passes
+MAX_SUICIDE_RETRIES = 4
+
+
+def _pack_bits(mask):
+    """Pack an (L, K) bool array into an (L, ceil(K / 64)) bit-plane."""
+    length, k = mask.shape
+    words = (k + 63) // 64
+    padded = np.zeros((length, words * 64), dtype=bool)
+    padded[:, :k] = mask
+    return np.packbits(padded, axis=1, bitorder="little").view(PLANE)
+
+
+def _unpack_bits(plane, k):
+    """Unpack a bit-plane back into an (L, K) bool array (or (K,) for a single row of words)."""
+    bits = np.unpackbits(np.ascontiguousarray(plane).view(np.uint8), axis=-1, bitorder="little")
+    return bits[..., :k].astype(bool)
+
+
+class _Layout:
+    """
+    Padded bit-plane layout for a batch of N x N boards.
+
+    A batch is stored as bit-planes of shape (L, W): one row per point of the
+    padded 1-D layout used by FastBoard (stride N + 1) and one bit per board,
+    64 boards to a word. Padding rows are always zero in the stone planes, so a
+    neighbour shift is four row-shifted ORs and every flood, eye test or capture
+    check handles 64 boards per machine word.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + 1
+        self.length = (size + 2) * self.stride + 1
+        onboard = np.zeros(self.length, dtype=bool)
+        for y in range(size):
+            start = (y + 1) * self.stride + 1
+            onboard[start:start + size] = True
+        self.points = np.flatnonzero(onboard)
+        self.onboard = np.where(onboard, ~np.uint64(0), np.uint64(0)).astype(PLANE)[:, None]
+
+        # Edge and corner points, where any enemy diagonal spoils an eye
+        edge = np.zeros(self.length, dtype=bool)
+        for p in self.points:
+            for d in (p - self.stride - 1, p - self.stride + 1, p + self.stride - 1, p + self.stride + 1):
+                if not onboard[d]:
+                    edge[p] = True
+        self.edge = np.where(edge, ~np.uint64(0), np.uint64(0)).astype(PLANE)[:, None]
+
+        # Enough random halvings to bring the candidates of a board down to about one
+        self.sample_rounds = int(np.ceil(np.log2(len(self.points)))) + 2
+
+    def shifted(self, plane, offsets):
+        """Return plane shifted by each of the given row offsets (shifted[p] = plane[p + offset])."""
+        out = []
+        for offset in offsets:
+            moved = np.zeros_like(plane)
+            if offset > 0:
+                moved[:-offset] = plane[offset:]
+            else:
+                moved[-offset:] = plane[:offset]
+            out.append(moved)
+        return out
+
+    def any_neighbor(self, plane):
+        """Return, for every point, whether any of its four neighbours is set."""
+        w = self.stride
+        out = np.zeros_like(plane)
+        out[1:] |= plane[:-1]
+        out[:-1] |= plane[1:]
+        out[w:] |= plane[:-w]
+        out[:-w] |= plane[w:]
+        return out
+
+    def alive(self, stones, empty):
+        """
+        Return the stones that belong to a group with at least one liberty.
+        Liberty is flooded outwards through connected stones until nothing changes.
+        """
+        alive = stones & self.any_neighbor(empty)
+        while True:
+            grown = alive | (stones & self.any_neighbor(alive))
+            if np.array_equal(grown, alive):
+                return alive
+            alive = grown
+
+
+def _at_least(planes):
+    """Return (at least one set, at least two set) over a list of planes."""
+    one = np.zeros_like(planes[0])
+    two = np.zeros_like(planes[0])
+    for plane in planes:
+        two |= one & plane
+        one |= plane
+    return one, two
+
+
+def _lowest(plane):
+    """Keep only the lowest set row of every board in the plane."""
+    seen = np.bitwise_or.accumulate(plane, axis=0)
+    first = plane.copy()
+    first[1:] &= ~seen[:-1]
+    return first
+
+
+def _any_rows(plane):
+    """Return the boards (as a row of words) that have any bit set in the plane."""
+    return np.bitwise_or.reduce(plane, axis=0)
+
+
+_layouts = {}
+
+
+def _get_layout(size):
+    layout = _layouts.get(size)
+    if layout is None:
+        layout = _layouts[size] = _Layout(size)
+    return layout
+
+
+def _pick_moves(layout, candidates, rng):
+    """
+    Draw one candidate point per board. Each round intersects the candidates with
+    random bits wherever that leaves something, which halves them on average; the
+    lowest survivor is taken, so the draw is uniform up to a small tie bias.
+
+    Only one random plane is generated. Every round rotates it within each word,
+    so a board reads the bits drawn for a different board slot each time, which
+    are independent of the ones it used before.
+    """
+    noise = np.frombuffer(rng.bytes(candidates.nbytes), dtype=PLANE).reshape(candidates.shape)
+    for r in range(layout.sample_rounds):
+        if r:
+            shift = np.uint64(r * 5)
+            rotated = (noise << shift) | (noise >> (np.uint64(64) - shift))
+        else:
+            rotated = noise
+        subset = candidates & rotated
+        keep = _any_rows(subset)
+        candidates = subset | (candidates & ~keep)
+    return _lowest(candidates)
+
+
+def _pack_boards(layout, boards):
+    k = boards.shape[0]
+    cells = np.full((layout.length, k), EMPTY, dtype=np.int8)
+    cells[layout.points] = boards.reshape(k, -1).T
+    return _pack_bits(cells == BLACK), _pack_bits(cells == WHITE)
+
+
+def _area_scores(layout, black, white, k, komi):
+    empty = layout.onboard & ~(black | white)
+    # Tromp-Taylor: flood the empty regions outwards from the points next to each color
+    black_reach = layout.alive(empty, black)
+    white_reach = layout.alive(empty, white)
+    black_area = black | (black_reach & ~white_reach)
+    white_area = white | (white_reach & ~black_reach)
+    return (_unpack_bits(black_area, k).sum(axis=0).astype(np.float64)
+            - _unpack_bits(white_area, k).sum(axis=0) - komi)
+
+
+def area_scores(boards, komi=6.5):
+    """
+    Return black's Tromp-Taylor area score minus white's (komi included) for
+    every board of a (K, N, N) batch: an empty region counts for a player when it
+    only touches that player's stones.
+    """
+    k, n, _ = boards.shape
+    layout = _get_layout(n)
+    black, white = _pack_boards(layout, boards)
+    return _area_scores(layout, black, white, k, komi)
+
+
+def batch_playouts(boards, to_move, rng=None, komi=6.5, max_moves=None):
+    """
+    Play K random games at once and return their final scores (black minus white).
+
+    :param boards: (K, N, N) int8 array of starting positions; the final positions are written back
+    :param to_move: (K,) array with the color to move on each board
+    :param rng: numpy Generator used for move sampling
+    :param komi: The komi value for white player
+    :param max_moves: safety cap on the number of steps, default 3 * N * N
+
+    Every step draws one move per board among empty points that are not the
+    player's own single-point eye or the ko point, detects captures and suicide
+    with a liberty flood over the bit-planes, and lets boards that drew a suicide
+    resample a few times before passing. A board stops after two passes in a row.
+    """
+    rng = rng or np.random.default_rng()
+    k, n, _ = boards.shape
+    layout = _get_layout(n)
+    onboard = layout.onboard
+    diagonal_offsets = (-layout.stride - 1, -layout.stride + 1, layout.stride - 1, layout.stride + 1)
+    neighbor_offsets = (-1, 1, -layout.stride, layout.stride)
+
+    black, white = _pack_boards(layout, boards)
+    black_to_move = _pack_bits((np.asarray(to_move) == BLACK)[None, :])[0]
+    active = _pack_bits(np.ones((1, k), dtype=bool))[0]
+    passed_last = np.zeros_like(active)
+    ko = np.zeros_like(black)
+    max_moves = max_moves or 3 * n * n
+
+    for _ in range(max_moves):
+        if not active.any():
+            break
+        own = (black & black_to_move) | (white & ~black_to_move)
+        enemy = (white & black_to_move) | (black & ~black_to_move)
+        empty = onboard & ~(black | white)
+
+        # Candidate points: empty, not one of our single-point eyes, not the ko point
+        surrounded = ~layout.any_neighbor(onboard & ~own)
+        one, two = _at_least(layout.shifted(enemy, diagonal_offsets))
+        spoiled = (one & layout.edge) | two
+        candidates = empty & ~(surrounded & ~spoiled) & ~ko & active
+
+        played = np.zeros_like(active)
+        new_ko = np.zeros_like(ko)
+        trying = _any_rows(candidates)
+        for _ in range(MAX_SUICIDE_RETRIES + 1):
+            if not trying.any():
+                break
+            move = _pick_moves(layout, candidates & trying, rng)
+
+            # Remove enemy groups left without liberties
+            own_after = own | move
+            empty_after = empty & ~move
+            dead = enemy & ~layout.alive(enemy, empty_after)
+            enemy_after = enemy & ~dead
+            empty_after |= dead
+
+            # The move is suicide if the placed stone's group still has no liberties
+            ok = trying & _any_rows(layout.alive(own_after, empty_after) & move)
+            own = (own_after & ok) | (own & ~ok)
+            enemy = (enemy_after & ok) | (enemy & ~ok)
+            empty = (empty_after & ok) | (empty & ~ok)
+            played |= ok
+
+            # A lone stone with one liberty that captured exactly one stone sets a ko
+            seen = np.bitwise_or.accumulate(dead, axis=0)
+            several = _any_rows(dead[1:] & seen[:-1])
+            friends = _any_rows(layout.any_neighbor(own_after & ~move) & move)
+            lib_one, lib_two = _at_least(layout.shifted(empty_after, neighbor_offsets))
+            one_liberty = _any_rows(lib_one & ~lib_two & move)
+            sets_ko = ok & seen[-1] & ~several & ~friends & one_liberty
+            new_ko |= dead & sets_ko
+
+            failed = trying & ~ok
+            candidates &= ~(move & failed)
+            trying = failed & _any_rows(candidates)
+
+        black = (own & black_to_move) | (enemy & ~black_to_move)
+        white = (enemy & black_to_move) | (own & ~black_to_move)
+        passed = active & ~played
+        active &= ~(passed & passed_last)
+        passed_last = passed
+        ko = new_ko
+        black_to_move ^= active
+
+    black_bits = _unpack_bits(black, k)[layout.points]
+    white_bits = _unpack_bits(white, k)[layout.points]
+    final = np.where(black_bits, BLACK, np.where(white_bits, WHITE, EMPTY)).astype(np.int8)
+    boards[:] = final.T.reshape(k, n, n)
+    return _area_scores(layout, black, white, k, komi)
+
+
+def boards_to_array(boards):
+    """Stack list-of-lists boards or FastBoards into a (K, N, N) int8 array."""
+    return np.array([board.to_list() if hasattr(board, "to_list") else board for board in boards],
+                    dtype=np.int8)
+
+
+def measure_batch_playouts_per_second(batch_size=1024, size=7, seconds=2.0, seed=0):
+    """Run batches of playouts from the empty board and return playouts per second."""
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    count = 0
+    while time.perf_counter() - start < seconds:
+        boards = np.zeros((batch_size, size, size), dtype=np.int8)
+        batch_playouts(boards, np.full(batch_size, BLACK), rng)
+        count += batch_size
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"{measure_batch_playouts_per_second():.0f} playouts/sec in batches of 1024")
@@ -0,0 +1,208 @@
+# go_game_benchmark.py
+
+import argparse
+import json
+import random
+import sys
+import time
+from go_game_constants import BOARD_SIZE, EMPTY, BLACK, WHITE
+from go_game_fast_board import FastBoard
+from go_game_mcts import MCTSNode, mcts, seed_search
+from go_game_rules import calculate_score, has_liberties, is_suicide, remove_dead_stones
+from go_game_scoring import area_counts, padded_cells
+
+BENCHMARK_SEED = 2024
+DEFAULT_THRESHOLD = 0.10  # A benchmark regresses when it gets more than 10% slower than the baseline
+MIN_TIME = 0.2            # Seconds each timing run lasts at least
+REPEATS = 3               # Timing runs per benchmark; the fastest one is reported
+
+
+def random_game_positions(seed, size=BOARD_SIZE, max_moves=None):
+    """
+    Play a random game with legal moves only (no eye filling) and return the
+    position after every move as (FastBoard, player to move).
+    """
+    rng = random.Random(seed)
+    board = FastBoard(size)
+    max_moves = max_moves or 3 * size * size
+    positions = []
+    color = BLACK
+    passes = 0
+    while passes < 2 and len(positions) < max_moves:
+        moves = [i for i in board.legal_indices(color)
+                 if not all(board.cells[n] == color for n in board.neighbors[i])]
+        if moves:
+            board.play_index(rng.choice(moves), color)
+            passes = 0
+        else:
+            passes += 1
+        color = WHITE if color == BLACK else BLACK
+        positions.append((board.copy(), color))
+    return positions
+
+
+def _groups_in_atari(board):
+    return sum(1 for libs in board.group_libs.values() if len(libs) == 1)
+
+
+def benchmark_positions(seed=BENCHMARK_SEED, size=BOARD_SIZE):
+    """
+    Return the fixed positions every benchmark runs on, by name: an opening, a
+    middle game, and the capture-heavy fight with the most groups in atari.
+    """
+    positions = random_game_positions(seed, size)
+    area = size * size
+    middle = min(area // 2, len(positions) - 1)
+    fight = max(range(middle, len(positions)), key=lambda k: _groups_in_atari(positions[k][0]))
+    return {"opening": positions[min(area // 8, middle)],
+            "middle": positions[middle],
+            "fight": positions[fight]}
+
+
+def time_operation(operation, ops_per_call=1, min_time=MIN_TIME, repeats=REPEATS):
+    """
+    Call operation repeatedly for at least min_time seconds, repeats times over,
+    and return the best nanoseconds per op (each call performs ops_per_call ops).
+    """
+    best = None
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter_ns()
+        while True:
+            operation()
+            calls += 1
+            elapsed = time.perf_counter_ns() - start
+            if elapsed >= min_time * 1e9:
+                break
+        ns_per_op = elapsed / (calls * ops_per_call)
+        best = ns_per_op if best is None else min(best, ns_per_op)
+    return best
+
+
+def _rule_benchmarks(name, board, player, min_time, repeats):
+    """Time the rules functions on both board types at one position"""
+    results = {}
+    for kind, position in (("list", board.to_list()), ("fast", board)):
+        stones = [(x, y) for y in range(board.size) for x in range(board.size) if position[y][x] != EMPTY]
+        empties = [(x, y) for y in range(board.size) for x in range(board.size) if position[y][x] == EMPTY]
+
+        def liberties():
+            for x, y in stones:
+                has_liberties(position, x, y)
+
+        def suicide():
+            for x, y in empties:
+                is_suicide(position, x, y, player)
+
+        if stones:
+            results[f"has_liberties/{name}/{kind}"] = time_operation(liberties, len(stones), min_time, repeats)
+        if empties:
+            results[f"is_suicide/{name}/{kind}"] = time_operation(suicide, len(empties), min_time, repeats)
+        # The positions are legal, so nothing is dead and the board is left unchanged
+        results[f"remove_dead_stones/{name}/{kind}"] = time_operation(
+            lambda: remove_dead_stones(position, player), 1, min_time, repeats)
+        # calculate_score is cached by position hash, so this mostly times the lookup
+        results[f"calculate_score/{name}/{kind}"] = time_operation(
+            lambda: calculate_score(position), 1, min_time, repeats)
+    # The uncached flood fill behind it
+    results[f"area_counts/{name}/list"] = time_operation(
+        lambda: area_counts(*padded_cells(board.to_list())), 1, min_time, repeats)
+    results[f"area_counts/{name}/fast"] = time_operation(
+        lambda: area_counts(board.cells, board.points, board.neighbors), 1, min_time, repeats)
+    return results
+
+
+def _count_nodes(root):
+    seen = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        stack.extend(node.children)
+    return len(seen)
+
+
+def run_benchmarks(seed=BENCHMARK_SEED, min_time=MIN_TIME, repeats=REPEATS, search_iterations=200,
+                   size=BOARD_SIZE):
+    """
+    Run every benchmark and return {name: {"ns_per_op": ..., "per_sec": ...}}.
+    Rollouts report playouts per second and mcts reports tree nodes per second.
+    """
+    results = {}
+    for name, (board, player) in benchmark_positions(seed, size).items():
+        results.update(_rule_benchmarks(name, board, player, min_time, repeats))
+
+        node = MCTSNode(board.copy(), player)
+        seed_search(seed)
+        results[f"rollout/{name}"] = time_operation(node.rollout, 1, min_time, repeats)
+
+        nodes = []
+
+        def search():
+            root = MCTSNode(board.copy(), player)
+            mcts(root, iter_limit=search_iterations)
+            nodes.append(_count_nodes(root))
+
+        seed_search(seed)
+        ns_per_call = time_operation(search, 1, min_time, repeats)
+        results[f"mcts/{name}"] = ns_per_call / (sum(nodes) / len(nodes))
+
+    return {name: {"ns_per_op": ns, "per_sec": 1e9 / ns} for name, ns in results.items()}
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results with a baseline of the same format and return
+    [(name, baseline ns, current ns, ratio)] for every benchmark that got more
+    than threshold slower. Benchmarks missing from either side are ignored.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        if name not in baseline:
+            continue
+        before = baseline[name]["ns_per_op"]
+        ratio = current["ns_per_op"] / before
+        if ratio > 1 + threshold:
+            regressions.append((name, before, current["ns_per_op"], ratio))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = []
+    for name, result in sorted(results.items()):
+        line = f"{name:<36} {result['ns_per_op']:>14.0f} ns/op {result['per_sec']:>14.1f} /sec"
+        if baseline and name in baseline:
+            line += f"  {result['ns_per_op'] / baseline[name]['ns_per_op']:.2f}x baseline"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the rules, playouts and search")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with a JSON file written by --output")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a benchmark counts as a regression")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--size", type=int, default=BOARD_SIZE)
+    args = parser.parse_args()
+
+    results = run_benchmarks(min_time=args.min_time, repeats=args.repeats, size=args.size)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before:.0f} -> {after:.0f} ns/op ({ratio:.2f}x)")
+        if regressions:
+            sys.exit(1)
@@ -1,22 +1,36 @@
 # go_game_board_logic.py
 
 from go_game_constants import BOARD_SIZE, EMPTY
+from go_game_fast_board import FastBoard
 from go_game_rules import is_suicide, remove_dead_stones
 
-def create_empty_board():
+def create_empty_board(size=BOARD_SIZE):
     """Create and return a fresh empty Go board."""
-    return [[EMPTY for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    return [[EMPTY for _ in range(size)] for _ in range(size)]
 
-def is_valid_position(x, y):
+def create_fast_board(size=BOARD_SIZE):
+    """Create and return a fresh empty array-backed Go board."""
+    return FastBoard(size)
+
+def copy_board(board):
+    """Return an independent copy of a list-of-lists board or a FastBoard."""
+    if isinstance(board, FastBoard):
+        return board.copy()
+    return [row[:] for row in board]
+
+def is_valid_position(x, y, size=BOARD_SIZE):
     """Check if the position is within board boundaries."""
-    return 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE
+    return 0 <= x < size and 0 <= y < size
 
 def place_stone(board, x, y, player):
     """
     Attempt to place a stone for the player.
     Returns a tuple (success, captured_stones).
     """
-    if not is_valid_position(x, y) or board[y][x] != EMPTY:
+    if isinstance(board, FastBoard):
+        return board.place_stone(x, y, player)
+
+    if not is_valid_position(x, y, len(board)) or board[y][x] != EMPTY:
         return False, []  # Invalid move: out of bounds or already occupied
 
     if is_suicide(board, x, y, player):
@@ -24,4 +38,4 @@ def place_stone(board, x, y, player):
 
     board[y][x] = player
     captured = remove_dead_stones(board, player)
-    return True, captured  # Legal move
\ No newline at end of file
+    return True, captured  # Legal move
@@ -0,0 +1,189 @@
+# go_game_compact_tree.py
+
+import math
+import time
+from array import array
+from go_game_constants import BLACK, WHITE
+from go_game_fast_board import FastBoard
+from go_game_mcts import CHECK_INTERVAL, playout_engine, should_stop, widening_limit
+from go_game_priors import ordered_indices
+
+# Default number of node slots preallocated for one search
+DEFAULT_NODE_BUDGET = 200000
+
+UNEXPANDED = -1  # child_count of a node whose legal moves have not been listed yet
+
+
+class CompactTree:
+    """
+    MCTS tree kept in preallocated typed arrays instead of MCTSNode objects.
+
+    Node n is a slot in parallel arrays: move (the board index played to reach
+    it), parent, first_child, child_count, expanded, visits and wins. The
+    children of a node are a contiguous block of slots, allocated in one go
+    when the node is first reached with its legal moves in the order
+    MCTSNode.expand pops them (highest prior first); expanded counts how many
+    of them have been added to the tree, which progressive widening limits
+    by the node's visits. No board is stored: every iteration copies the root
+    board once and replays the moves while descending.
+
+    Selection, expansion, rollouts and the returned move follow the object
+    tree in go_game_mcts, so both give the same result for the same seed as
+    long as the node budget is not reached. Once it is, nodes that would need
+    new slots are played out as leaves instead of expanded.
+    """
+
+    def __init__(self, board, player, max_nodes=DEFAULT_NODE_BUDGET):
+        self.board = board.copy() if isinstance(board, FastBoard) else FastBoard.from_list(board)
+        self.player = player
+        self.max_nodes = max_nodes
+        zeros = array("i", [0]) * max_nodes
+        self.move = array("i", zeros)
+        self.parent = array("i", zeros)
+        self.first_child = array("i", zeros)
+        self.child_count = array("i", zeros)
+        self.expanded = array("i", zeros)
+        self.visits = array("i", zeros)
+        self.wins = array("d", [0.0]) * max_nodes
+        # Exact result for the player who moved into the node once proven (as MCTSNode.proven), -1 while unknown
+        self.proven = array("d", [-1.0]) * max_nodes
+        self.parent[0] = -1
+        self.child_count[0] = UNEXPANDED
+        self.size = 1  # Slots in use; slot 0 is the root
+        self.full = False  # Set once an expansion did not fit in the budget
+
+    def __len__(self):
+        return self.size
+
+    def _allocate(self, node, board, player):
+        """List the legal moves of node and give them a block of child slots; False if the budget is used up"""
+        moves = ordered_indices(board, player)
+        start = self.size
+        if start + len(moves) > self.max_nodes:
+            self.full = True
+            return False
+        for k, i in enumerate(moves):
+            child = start + k
+            self.move[child] = i
+            self.parent[child] = node
+            self.first_child[child] = 0
+            self.child_count[child] = UNEXPANDED
+            self.expanded[child] = 0
+            self.visits[child] = 0
+            self.wins[child] = 0.0
+            self.proven[child] = -1.0
+        self.first_child[node] = start
+        self.child_count[node] = len(moves)
+        self.size += len(moves)
+        return True
+
+    def _best_child(self, node, c_param=1.41):
+        """UCB1 over the children of node in the tree, exactly as MCTSNode.best_child computes it"""
+        visits = self.visits
+        wins = self.wins
+        log_visits = math.log(visits[node])
+        first = self.first_child[node]
+        best = first
+        best_weight = None
+        for c in range(first, first + self.expanded[node]):
+            weight = (wins[c] / visits[c]) + c_param * math.sqrt((2 * log_visits / visits[c]))
+            if best_weight is None or weight > best_weight:
+                best, best_weight = c, weight
+        return best
+
+    def _select_and_expand(self):
+        """
+        Descend from the root, replaying the moves on a copy of the root board, and
+        expand one child. Returns the path of slots, the board at the last node and
+        the player to move there.
+        """
+        board = self.board.copy()
+        player = self.player
+        node = 0
+        path = [0]
+        while self.proven[node] < 0:  # A proven node is not searched below
+            count = self.child_count[node]
+            if count == UNEXPANDED:
+                if not self._allocate(node, board, player):
+                    break
+                count = self.child_count[node]
+            if not count:
+                break  # No legal moves: a terminal node
+            expanding = self.expanded[node] < count and self.expanded[node] < widening_limit(self.visits[node])
+            if expanding:
+                child = self.first_child[node] + self.expanded[node]
+                self.expanded[node] += 1
+            else:
+                child = self._best_child(node)
+            board.play_index(self.move[child], player)
+            player = WHITE if player == BLACK else BLACK
+            path.append(child)
+            node = child
+            if expanding:
+                break
+        return path, board, player
+
+    def _backpropagate(self, path, result):
+        visits = self.visits
+        wins = self.wins
+        for node in reversed(path):
+            visits[node] += 1
+            wins[node] += result
+            result = 1 - result
+
+    def child_visits(self, node=0):
+        first = self.first_child[node]
+        return [self.visits[c] for c in range(first, first + self.expanded[node])]
+
+    def child_stats(self, node=0):
+        """Return {(x, y): (visits, wins)} for the children of node that are in the tree"""
+        first = self.first_child[node]
+        return {self.board.coords(self.move[c]): (self.visits[c], self.wins[c])
+                for c in range(first, first + self.expanded[node])}
+
+    def most_visited_move(self):
+        """
+        The most visited root move (the last one in child order on ties, like
+        go_game_mcts), or None to pass; a child proven a win comes first.
+        """
+        first = self.first_child[0]
+        best = None
+        for c in range(first, first + self.expanded[0]):
+            if self.proven[c] == 1:
+                return self.board.coords(self.move[c])
+            if best is None or self.visits[c] >= self.visits[best]:
+                best = c
+        return None if best is None else self.board.coords(self.move[best])
+
+    def search(self, iter_limit=100, deadline=None, solver=None):
+        """
+        Run MCTS iterations like go_game_mcts.mcts and return the most visited move
+        (None means pass). With an EndgameSolver, small leaves are solved and
+        proven as in MCTSNode.rollout.
+        """
+        start = time.time()
+        done = 0
+        while iter_limit is None or done < iter_limit:
+            if done and done % CHECK_INTERVAL == 0 and should_stop(None, done, iter_limit, deadline, start,
+                                                                   self.child_visits()):
+                break
+            path, board, player = self._select_and_expand()
+            leaf = path[-1]
+            result = self.proven[leaf]
+            if result < 0:
+                result = solver.solve_leaf(board, player, deadline) if solver is not None else None
+                if result is None:
+                    winner = BLACK if playout_engine.run(board, player) > 0 else WHITE
+                    result = 1 if winner != player else 0
+                else:
+                    self.proven[leaf] = result
+            if self.proven[leaf] == 1 and len(path) > 1:
+                self.proven[path[-2]] = 0.0  # See go_game_mcts.prove_path
+            self._backpropagate(path, result)
+            done += 1
+        return self.most_visited_move()
+
+
+def compact_mcts(board, player, iter_limit=100, deadline=None, max_nodes=DEFAULT_NODE_BUDGET, solver=None):
+    """Search the position with a CompactTree and return the best move (None means pass)"""
+    return CompactTree(board, player, max_nodes).search(iter_limit, deadline, solver)
@@ -25,6 +25,7 @@ BOARD_PADDING = 40
 SIDEBAR_WIDTH = 200
 WINDOW_WIDTH = BOARD_PADDING * 2 + CELL_SIZE * BOARD_SIZE + SIDEBAR_WIDTH
 WINDOW_HEIGHT = BOARD_PADDING * 2 + CELL_SIZE * BOARD_SIZE
+MAX_BOARD_PIXELS = 720  # Larger boards shrink CELL_SIZE to fit in this many pixels
 
 # Colors
 BG_COLOR = (245, 222, 179)    # Wooden background
@@ -0,0 +1,341 @@
+# go_game_fast_board.py
+
+from go_game_constants import BOARD_SIZE, EMPTY, BLACK, WHITE
+from go_game_geometry import get_board_tables
+from go_game_zobrist import get_zobrist_table
+
+
+class FastBoard:
+    """
+    Go board stored as a flat, padded 1-D array.
+
+    Point (x, y) lives at index (y + 1) * (size + 1) + x + 1. One padding column
+    is shared between the right edge of a row and the left edge of the next one,
+    so the four neighbours of any point are always i - 1, i + 1, i - stride and
+    i + stride without bounds checks.
+
+    Every stone records the id of its group, and each group keeps its stone list
+    and liberty set. Placing a stone, capturing and checking for suicide only
+    touch the neighbouring groups instead of flood-filling the whole board.
+
+    The board also carries an incremental Zobrist hash of the position and the
+    set of hashes of every position seen so far, which enforces positional
+    superko with a single set lookup.
+
+    The point list and the neighbour and diagonal tables come from
+    go_game_geometry and are shared by all boards of the same size.
+    """
+
+    def __init__(self, size=BOARD_SIZE):
+        tables = get_board_tables(size)
+        self.size = size
+        self.stride = tables.stride
+        self.cells = tables.cells[:]
+        self.group_of = [0] * tables.length  # group id of the stone on each cell
+        self.group_stones = {}             # group id -> list of stone indices
+        self.group_libs = {}               # group id -> set of liberty indices
+        self.zobrist = get_zobrist_table(size)
+        self.hash = 0
+        self.history = {0}                 # hashes of every position that has occurred
+        self.points = tables.points
+        self.neighbors = tables.neighbors
+        self.diagonals = tables.diagonals
+
+    # ------------------------------------------------------------------
+    # Coordinates and list-of-lists interop
+    # ------------------------------------------------------------------
+
+    def index(self, x, y):
+        """Return the array index of the point (x, y)."""
+        return (y + 1) * self.stride + x + 1
+
+    def coords(self, i):
+        """Return the (x, y) coordinates of the array index i."""
+        y, x = divmod(i, self.stride)
+        return x - 1, y - 1
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, y):
+        """
+        Return row y as a tuple so that board[y][x] reads work as on a list board.
+        The row is a copy, so it is read-only: a board[y][x] = c write meant for a
+        list board raises TypeError instead of silently changing nothing.
+        """
+        start = (y + 1) * self.stride + 1
+        return tuple(self.cells[start:start + self.size])
+
+    def __iter__(self):
+        for y in range(self.size):
+            yield self[y]
+
+    def to_list(self):
+        """Return the position as a list-of-lists board."""
+        return [list(self[y]) for y in range(self.size)]
+
+    @classmethod
+    def from_list(cls, board):
+        """Build a FastBoard from a list-of-lists board."""
+        fast = cls(len(board))
+        for y, row in enumerate(board):
+            for x, stone in enumerate(row):
+                fast.cells[fast.index(x, y)] = stone
+        fast._rebuild_groups()
+        fast.hash = 0
+        for i in fast.points:
+            fast.hash ^= fast.zobrist[fast.cells[i]][i]
+        fast.history = {fast.hash}
+        return fast
+
+    def copy(self):
+        """Return an independent copy of the board."""
+        new = FastBoard.__new__(FastBoard)
+        new.size = self.size
+        new.stride = self.stride
+        new.points = self.points
+        new.neighbors = self.neighbors
+        new.diagonals = self.diagonals
+        new.zobrist = self.zobrist
+        new.hash = self.hash
+        new.history = set(self.history)
+        new.cells = self.cells[:]
+        new.group_of = self.group_of[:]
+        new.group_stones = {gid: stones[:] for gid, stones in self.group_stones.items()}
+        new.group_libs = {gid: set(libs) for gid, libs in self.group_libs.items()}
+        return new
+
+    def _rebuild_groups(self):
+        """Recompute every group and its liberties from the raw cells."""
+        cells = self.cells
+        self.group_of = [0] * len(cells)
+        self.group_stones = {}
+        self.group_libs = {}
+        for i in self.points:
+            if cells[i] == EMPTY or self.group_of[i]:
+                continue
+            color = cells[i]
+            stones = []
+            libs = set()
+            stack = [i]
+            self.group_of[i] = i
+            while stack:
+                s = stack.pop()
+                stones.append(s)
+                for n in self.neighbors[s]:
+                    if cells[n] == EMPTY:
+                        libs.add(n)
+                    elif cells[n] == color and not self.group_of[n]:
+                        self.group_of[n] = i
+                        stack.append(n)
+            self.group_stones[i] = stones
+            self.group_libs[i] = libs
+
+    # ------------------------------------------------------------------
+    # Rules
+    # ------------------------------------------------------------------
+
+    def liberties(self, i):
+        """Return the number of liberties of the group holding the stone at index i."""
+        return len(self.group_libs[self.group_of[i]])
+
+    def is_suicide_index(self, i, color):
+        """Check if playing color at the empty index i would leave it without liberties."""
+        cells = self.cells
+        group_of = self.group_of
+        group_libs = self.group_libs
+        for n in self.neighbors[i]:
+            stone = cells[n]
+            if stone == EMPTY:
+                return False
+            libs = len(group_libs[group_of[n]])
+            if stone == color:
+                if libs > 1:
+                    return False
+            elif libs == 1:
+                return False  # The move captures this group
+        return True
+
+    def hash_after(self, i, color):
+        """Return the position hash after color plays at the empty index i, without playing it."""
+        cells = self.cells
+        group_of = self.group_of
+        opponent = BLACK if color == WHITE else WHITE
+        opponent_keys = self.zobrist[opponent]
+        h = self.hash ^ self.zobrist[color][i]
+        seen = []
+        for n in self.neighbors[i]:
+            if cells[n] != opponent:
+                continue
+            gid = group_of[n]
+            if gid in seen:
+                continue
+            seen.append(gid)
+            if len(self.group_libs[gid]) == 1:
+                for s in self.group_stones[gid]:
+                    h ^= opponent_keys[s]
+        return h
+
+    def is_superko_index(self, i, color):
+        """Check if playing color at index i would repeat an earlier position."""
+        return self.hash_after(i, color) in self.history
+
+    def is_legal_index(self, i, color):
+        """Check if color may play at index i (empty, not suicide, not a superko repeat)."""
+        return (self.cells[i] == EMPTY and not self.is_suicide_index(i, color)
+                and self.hash_after(i, color) not in self.history)
+
+    def legal_indices(self, color):
+        """
+        Return the indices of every legal move for color, without copying the board.
+        Each empty point is classified from its neighbours' liberty counts; the hash
+        lookup for superko only costs extra stones when the move captures.
+        """
+        cells = self.cells
+        neighbors = self.neighbors
+        group_of = self.group_of
+        group_libs = self.group_libs
+        history = self.history
+        opponent = BLACK if color == WHITE else WHITE
+        legal = []
+        for i in self.points:
+            if cells[i] != EMPTY:
+                continue
+            captures = False
+            breathes = False
+            for n in neighbors[i]:
+                stone = cells[n]
+                if stone == EMPTY:
+                    breathes = True
+                elif len(group_libs[group_of[n]]) == 1:
+                    if stone == opponent:
+                        captures = True
+                elif stone == color:
+                    breathes = True
+            if captures:
+                if self.hash_after(i, color) not in history:
+                    legal.append(i)
+            elif breathes:
+                if (self.hash ^ self.zobrist[color][i]) not in history:
+                    legal.append(i)
+        return legal
+
+    def legal_moves(self, color):
+        """Return the (x, y) coordinates of every legal move for color."""
+        return [self.coords(i) for i in self.legal_indices(color)]
+
+    def play_index(self, i, color):
+        """
+        Place a stone of color at index i, updating groups, captures and the hash.
+        Returns the list of captured indices, or None if the move is illegal.
+        """
+        if not self.is_legal_index(i, color):
+            return None
+        captured = self._place(i, color)
+        self.history.add(self.hash)
+        return captured
+
+    def _place(self, i, color):
+        """
+        Place a stone without any legality check or history update and return the
+        captured indices. Callers must already know that the move is legal.
+        """
+        cells = self.cells
+        group_of = self.group_of
+        group_stones = self.group_stones
+        group_libs = self.group_libs
+        opponent = BLACK if color == WHITE else WHITE
+        cells[i] = color
+
+        # Merge the new stone with friendly neighbours into the largest group
+        friends = []
+        libs = set()
+        for n in self.neighbors[i]:
+            stone = cells[n]
+            if stone == EMPTY:
+                libs.add(n)
+            elif stone == color:
+                gid = group_of[n]
+                if gid not in friends:
+                    friends.append(gid)
+
+        if friends:
+            gid = max(friends, key=lambda g: len(group_stones[g]))
+            stones = group_stones[gid]
+            group_libs[gid] |= libs
+            libs = group_libs[gid]
+            for other in friends:
+                if other == gid:
+                    continue
+                for s in group_stones.pop(other):
+                    group_of[s] = gid
+                    stones.append(s)
+                libs |= group_libs.pop(other)
+            stones.append(i)
+            libs.discard(i)
+        else:
+            gid = i
+            group_stones[gid] = [i]
+            group_libs[gid] = libs
+        group_of[i] = gid
+        self.hash ^= self.zobrist[color][i]
+
+        # Take the liberty away from adjacent opponent groups and capture the dead ones
+        captured = []
+        for n in self.neighbors[i]:
+            if cells[n] != opponent:
+                continue
+            enemy = group_of[n]
+            enemy_libs = group_libs[enemy]
+            enemy_libs.discard(i)
+            if not enemy_libs:
+                captured.extend(self._remove_group(enemy))
+        return captured
+
+    def _remove_group(self, gid):
+        """Remove a group from the board and give its points back as liberties."""
+        cells = self.cells
+        group_of = self.group_of
+        group_libs = self.group_libs
+        stones = self.group_stones.pop(gid)
+        del group_libs[gid]
+        keys = self.zobrist[cells[stones[0]]]
+        h = self.hash
+        for s in stones:
+            h ^= keys[s]
+            cells[s] = EMPTY
+            group_of[s] = 0
+        self.hash = h
+        for s in stones:
+            for n in self.neighbors[s]:
+                if cells[n] != EMPTY:
+                    group_libs[group_of[n]].add(s)
+        return stones
+
+    # ------------------------------------------------------------------
+    # Coordinate wrappers matching go_game_rules / go_game_board_logic
+    # ------------------------------------------------------------------
+
+    def has_liberties(self, x, y):
+        """Check if the stone at (x, y) has liberties."""
+        return self.liberties(self.index(x, y)) > 0
+
+    def is_suicide(self, x, y, player):
+        """Check if placing a stone at (x, y) is a suicide move."""
+        return self.is_suicide_index(self.index(x, y), player)
+
+    def is_superko(self, x, y, player):
+        """Check if placing a stone at (x, y) would repeat an earlier position."""
+        return self.is_superko_index(self.index(x, y), player)
+
+    def place_stone(self, x, y, player):
+        """
+        Attempt to place a stone for the player.
+        Returns a tuple (success, captured_stones) like go_game_board_logic.place_stone.
+        """
+        if not (0 <= x < self.size and 0 <= y < self.size):
+            return False, []
+        captured = self.play_index(self.index(x, y), player)
+        if captured is None:
+            return False, []
+        return True, [self.coords(i) for i in captured]
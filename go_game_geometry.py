@@ -0,0 +1,60 @@
+# go_game_geometry.py
+
+from go_game_constants import BOARD_SIZE, EMPTY
+
+# Cell value used for the padding around the playable area
+OFFBOARD = 3
+
+_tables = {}
+
+
+class BoardTables:
+    """
+    Neighbour, diagonal and edge tables for one board size, built once and
+    shared by every board of that size.
+
+    Index tables use the padded 1-D layout of FastBoard, where point (x, y)
+    lives at (y + 1) * (size + 1) + x + 1. coord_neighbors[y][x] holds the same
+    neighbours as (x, y) tuples for list-of-lists boards.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.stride = size + 1
+        self.length = (size + 2) * self.stride + 1
+
+        # Starting cells of an empty board: EMPTY on the board, OFFBOARD in the padding
+        self.cells = [OFFBOARD] * self.length
+        self.points = []
+        for y in range(size):
+            for x in range(size):
+                i = (y + 1) * self.stride + x + 1
+                self.cells[i] = EMPTY
+                self.points.append(i)
+
+        # Neighbour lists per index, only holding on-board points
+        self.neighbors = [()] * self.length
+        # Diagonal lists per index, used by the playout eye test
+        self.diagonals = [()] * self.length
+        # Whether each index is on the first line
+        self.edge = [False] * self.length
+        for i in self.points:
+            self.neighbors[i] = tuple(n for n in (i - 1, i + 1, i - self.stride, i + self.stride)
+                                      if self.cells[n] != OFFBOARD)
+            self.diagonals[i] = tuple(n for n in (i - self.stride - 1, i - self.stride + 1,
+                                                  i + self.stride - 1, i + self.stride + 1)
+                                      if self.cells[n] != OFFBOARD)
+            self.edge[i] = len(self.neighbors[i]) < 4
+
+        self.coord_neighbors = [[tuple((nx, ny) for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                                       if 0 <= nx < size and 0 <= ny < size)
+                                 for x in range(size)]
+                                for y in range(size)]
+
+
+def get_board_tables(size=BOARD_SIZE):
+    """Return the cached BoardTables for a board size."""
+    tables = _tables.get(size)
+    if tables is None:
+        tables = _tables[size] = BoardTables(size)
+    return tables
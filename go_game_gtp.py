@@ -0,0 +1,298 @@
+# go_game_gtp.py
+
+import argparse
+import socket
+import sys
+from go_game_ai import SAFETY_MARGIN, GoAI
+from go_game_constants import BOARD_SIZE, BLACK, WHITE, SYMBOLS
+from go_game_playout import is_eye
+from go_game_priors import ordered_indices
+from go_game_records import sgf_result
+from go_game_state import GoGame
+
+GTP_COLUMNS = "ABCDEFGHJKLMNOPQRSTUVWXYZ"  # GTP skips the letter I
+MAX_GTP_SIZE = len(GTP_COLUMNS)
+ENGINE_NAME = "GoAI"
+ENGINE_VERSION = "1.0"
+
+
+class GTPError(Exception):
+    """A command failed; the message is sent back as the GTP error response"""
+
+
+def parse_color(text):
+    color = text.lower()
+    if color in ("b", "black"):
+        return BLACK
+    if color in ("w", "white"):
+        return WHITE
+    raise GTPError("invalid color")
+
+
+def parse_vertex(text, size):
+    """GTP vertex (e.g. D4, with row 1 at the bottom) to (x, y) with y = 0 at the top, or None for pass"""
+    text = text.upper()
+    if text == "PASS":
+        return None
+    column = GTP_COLUMNS.find(text[:1])
+    try:
+        row = int(text[1:])
+    except ValueError:
+        raise GTPError("invalid vertex")
+    if not 0 <= column < size or not 1 <= row <= size:
+        raise GTPError("invalid vertex")
+    return column, size - row
+
+
+def format_vertex(move, size):
+    if move is None:
+        return "pass"
+    x, y = move
+    return f"{GTP_COLUMNS[x]}{size - y}"
+
+
+class GTPEngine:
+    """
+    Go Text Protocol front-end for GoAI, without pygame.
+
+    One engine keeps a single GoAI for its whole life, so its transposition table,
+    opening book and reused tree stay warm across moves and across games;
+    clear_board only forgets the tree, and a new GoAI is made only when the
+    board size changes. handle takes one command line and returns the response.
+    """
+
+    def __init__(self, size=BOARD_SIZE, komi=6.5, ai_options=None):
+        self.ai_options = dict(ai_options or {})
+        self.komi = komi
+        self.size = None
+        self.ai = None
+        self.game = None
+        self.quit = False
+        self.time_left = {BLACK: None, WHITE: None}  # Seconds left on each clock, from time_left
+        self.stones_left = {BLACK: 0, WHITE: 0}     # Stones to play in the current byo-yomi period
+        self.main_time = None
+        self.set_size(size)
+        self.commands = {
+            "protocol_version": lambda args: "2",
+            "name": lambda args: ENGINE_NAME,
+            "version": lambda args: ENGINE_VERSION,
+            "known_command": lambda args: "true" if args and args[0] in self.commands else "false",
+            "list_commands": lambda args: "\n".join(sorted(self.commands)),
+            "quit": self.cmd_quit,
+            "boardsize": self.cmd_boardsize,
+            "clear_board": self.cmd_clear_board,
+            "komi": self.cmd_komi,
+            "play": self.cmd_play,
+            "genmove": self.cmd_genmove,
+            "kgs-genmove_cleanup": self.cmd_genmove_cleanup,
+            "time_settings": self.cmd_time_settings,
+            "time_left": self.cmd_time_left,
+            "final_score": self.cmd_final_score,
+            "showboard": self.cmd_showboard,
+        }
+
+    def set_size(self, size):
+        if size != self.size:
+            if self.ai is not None:
+                self.ai.close()
+            self.size = size
+            self.ai = GoAI(board_size=size, komi=self.komi, **self.ai_options)
+        self.new_game()
+
+    def new_game(self):
+        self.game = GoGame(self.size, self.komi)
+        self.ai.new_game()
+        self.ai.set_komi(self.komi)
+        self.time_left = {BLACK: self.main_time, WHITE: self.main_time}
+        self.stones_left = {BLACK: 0, WHITE: 0}
+
+    def handle(self, line):
+        """Run one command line and return the full response (ending in a blank line), or None for no command"""
+        line = line.split("#", 1)[0].replace("\t", " ").strip()
+        if not line:
+            return None
+        words = line.split()
+        command_id = ""
+        if words[0].isdigit():
+            command_id = words.pop(0)
+            if not words:
+                return None
+        name, args = words[0], words[1:]
+        command = self.commands.get(name)
+        try:
+            if command is None:
+                raise GTPError("unknown command")
+            result = command(args)
+        except GTPError as error:
+            return f"?{command_id} {error}\n\n"
+        return f"={command_id} {result or ''}".rstrip(" ") + "\n\n"
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    def cmd_quit(self, args):
+        self.quit = True
+
+    def cmd_boardsize(self, args):
+        try:
+            size = int(args[0])
+        except (IndexError, ValueError):
+            raise GTPError("boardsize not an integer")
+        if not 2 <= size <= MAX_GTP_SIZE:
+            raise GTPError("unacceptable size")
+        self.set_size(size)
+
+    def cmd_clear_board(self, args):
+        self.new_game()
+
+    def cmd_komi(self, args):
+        try:
+            self.komi = float(args[0])
+        except (IndexError, ValueError):
+            raise GTPError("komi not a float")
+        self.game.komi = self.komi
+        self.game.record.komi = self.komi
+        self.ai.set_komi(self.komi)
+
+    def cmd_play(self, args):
+        if len(args) < 2:
+            raise GTPError("invalid color or coordinate")
+        color = parse_color(args[0])
+        move = parse_vertex(args[1], self.size)
+        self.game.current_player = color
+        if move is None:
+            self.game.pass_move()
+        elif not self.game.play(*move)[0]:
+            raise GTPError("illegal move")
+
+    def cmd_genmove(self, args, cleanup=False):
+        if not args:
+            raise GTPError("invalid color")
+        color = parse_color(args[0])
+        game = self.game
+        game.current_player = color
+        if self._should_pass(color) and not cleanup:
+            move = stats = None
+        else:
+            move = self.ai.get_move(game.board, color, **self._clock(color))
+            stats = self.ai.last_move_stats
+            if cleanup and (move is None or is_eye(game.board, game.board.index(*move), color)):
+                move = self._cleanup_move(color)
+        if move is None:
+            game.pass_move(stats)
+        elif not game.play(*move, stats=stats)[0]:
+            # An engine bug; report it rather than passing in its place
+            raise GTPError(f"engine generated the illegal move {format_vertex(move, self.size)}")
+        return format_vertex(move, self.size)
+
+    def cmd_genmove_cleanup(self, args):
+        """
+        kgs-genmove_cleanup: like genmove, but never passes while a move other than
+        filling an own eye is left, so dead stones get captured before scoring
+        """
+        return self.cmd_genmove(args, cleanup=True)
+
+    def cmd_time_settings(self, args):
+        try:
+            main_time, byo_yomi_time, byo_yomi_stones = (int(a) for a in args[:3])
+        except ValueError:
+            raise GTPError("syntax error")
+        self.main_time = main_time if main_time or byo_yomi_time else None  # 0 0 means no time limit
+        self.time_left = {BLACK: self.main_time, WHITE: self.main_time}
+
+    def cmd_time_left(self, args):
+        if len(args) < 3:
+            raise GTPError("syntax error")
+        color = parse_color(args[0])
+        try:
+            self.time_left[color] = float(args[1])
+            self.stones_left[color] = int(args[2])
+        except ValueError:
+            raise GTPError("syntax error")
+
+    def cmd_final_score(self, args):
+        black_score, white_score = self.game.score()
+        return sgf_result(black_score - white_score)
+
+    def cmd_showboard(self, args):
+        board = self.game.board
+        lines = ["   " + " ".join(GTP_COLUMNS[:self.size])]
+        for y in range(self.size):
+            lines.append(f"{self.size - y:2d} " + " ".join(SYMBOLS[stone] for stone in board[y]))
+        return "\n" + "\n".join(lines)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _clock(self, color):
+        """get_move keyword arguments for the clock of color: its main time, or a share of a byo-yomi period"""
+        seconds = self.time_left[color]
+        if seconds is None:
+            return {}
+        stones = self.stones_left[color]
+        if stones > 0:
+            return {"move_time": seconds * (1 - SAFETY_MARGIN) / stones}
+        return {"time_left": seconds}
+
+    def _should_pass(self, color):
+        """Pass right after the opponent passed when the position already scores as a win for color"""
+        moves = self.game.moves
+        if not moves or moves[-1][1] is not None:
+            return False
+        black_score, white_score = self.game.score()
+        return black_score > white_score if color == BLACK else white_score > black_score
+
+    def _cleanup_move(self, color):
+        """The best-ranked legal move that does not fill one of color's own eyes, or None"""
+        board = self.game.board
+        for i in ordered_indices(board, color):
+            if not is_eye(board, i, color):
+                return board.coords(i)
+        return None
+
+    def close(self):
+        self.ai.close()
+
+
+def serve(engine, infile, outfile):
+    """Answer GTP commands from infile on outfile until quit or end of input"""
+    for line in infile:
+        response = engine.handle(line)
+        if response is not None:
+            outfile.write(response)
+            outfile.flush()
+        if engine.quit:
+            break
+
+
+def serve_socket(engine, port, host="127.0.0.1"):
+    """Serve one GTP connection after another on a local port with the same warm engine"""
+    with socket.create_server((host, port)) as server:
+        while True:
+            connection, _ = server.accept()
+            with connection, connection.makefile("r") as infile, connection.makefile("w") as outfile:
+                serve(engine, infile, outfile)
+            if engine.quit:
+                break
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Go Text Protocol engine for GoAI (stdin/stdout or a local socket)")
+    parser.add_argument("--size", type=int, default=BOARD_SIZE)
+    parser.add_argument("--komi", type=float, default=6.5)
+    parser.add_argument("--simulations", type=int, default=1000, help="iterations per move without a clock")
+    parser.add_argument("--max-move-time", type=float, help="upper bound in seconds on one clock-based move")
+    parser.add_argument("--book", help="opening book file (go_game_opening_book)")
+    parser.add_argument("--port", type=int, help="listen on this local port instead of stdin/stdout")
+    args = parser.parse_args()
+    engine = GTPEngine(args.size, args.komi, {"simulations": args.simulations, "max_move_time": args.max_move_time,
+                                              "book_path": args.book})
+    try:
+        if args.port:
+            serve_socket(engine, args.port)
+        else:
+            serve(engine, sys.stdin, sys.stdout)
+    finally:
+        engine.close()
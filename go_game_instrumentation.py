@@ -0,0 +1,114 @@
+# go_game_instrumentation.py
+
+import json
+import time
+from collections import Counter
+
+PHASES = ("select", "expand", "rollout", "backpropagate")
+MAX_TRACE_EVENTS = 200000  # Per-iteration trace spans kept for one move; later ones are dropped
+
+
+class SearchStats:
+    """
+    Measurements of one search, filled in by go_game_mcts.mcts when it is given
+    a SearchStats; a search without one runs no instrumentation code at all.
+
+    Collects the wall time of each phase, iteration, node and playout counts,
+    histograms of selection depth and of the branching factor (legal moves) of
+    new nodes, and the final visits of every root move. With trace=True each
+    phase of each iteration is also kept as a span for a Chrome trace.
+    """
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.phase_seconds = dict.fromkeys(PHASES, 0.0)
+        self.iterations = 0
+        self.new_nodes = 0  # Nodes created; each lists its legal moves once
+        self.playouts = 0
+        self.depths = Counter()     # Selection path length (leaf depth) -> iterations
+        self.branching = Counter()  # Legal moves of a new node -> nodes
+        self.root_visits = {}       # (x, y) -> (visits, wins) when the search ended
+        self.move = None
+        self.start = None
+        self.seconds = 0.0
+        self.events = []  # (phase, start, end) in perf_counter seconds
+
+    def begin(self):
+        self.start = time.perf_counter()
+
+    def end(self, root, move):
+        """Close the search and keep the root visit distribution and the chosen move"""
+        self.seconds = time.perf_counter() - self.start
+        self.move = move
+        self.root_visits = root.child_stats()
+
+    def record_iteration(self, path, new_node, times):
+        """
+        Add one iteration: its selection path, whether the leaf is a new node, and
+        the perf_counter readings at the start and after each of the four phases.
+        """
+        self.iterations += 1
+        self.playouts += 1
+        self.depths[len(path) - 1] += 1
+        if new_node:
+            self.new_nodes += 1
+            self.branching[len(path[-1].untried_moves)] += 1
+        for phase, start, end in zip(PHASES, times, times[1:]):
+            self.phase_seconds[phase] += end - start
+            if self.trace and len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append((phase, start, end))
+
+    def iterations_per_second(self):
+        return self.iterations / self.seconds if self.seconds else 0.0
+
+    def to_dict(self):
+        """All measurements as JSON-ready values"""
+        return {
+            "move": self.move,
+            "seconds": self.seconds,
+            "iterations": self.iterations,
+            "iterations_per_second": self.iterations_per_second(),
+            "new_nodes": self.new_nodes,
+            "playouts": self.playouts,
+            "phase_seconds": self.phase_seconds,
+            "depth_histogram": {str(k): v for k, v in sorted(self.depths.items())},
+            "branching_histogram": {str(k): v for k, v in sorted(self.branching.items())},
+            "max_depth": max(self.depths) if self.depths else 0,
+            "root_visits": [{"move": move, "visits": visits, "wins": wins}
+                            for move, (visits, wins) in sorted(self.root_visits.items(),
+                                                               key=lambda item: -item[1][0])],
+        }
+
+    def to_json(self, path=None):
+        """Return the measurements as a JSON string, also writing it to path when given"""
+        text = json.dumps(self.to_dict(), indent=2)
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_chrome_trace(self, path=None, pid=1, tid=1):
+        """
+        Return the search as a Chrome trace (chrome://tracing or Perfetto): one
+        span for the whole move and, when traced, one per phase of every iteration.
+        """
+        events = [{"name": "search", "ph": "X", "pid": pid, "tid": tid, "ts": 0.0, "dur": self.seconds * 1e6,
+                   "args": {"iterations": self.iterations, "move": self.move}}]
+        for phase, start, end in self.events:
+            events.append({"name": phase, "ph": "X", "pid": pid, "tid": tid,
+                           "ts": (start - self.start) * 1e6, "dur": (end - start) * 1e6})
+        trace = {"traceEvents": events, "displayTimeUnit": "ms"}
+        if path:
+            with open(path, "w") as f:
+                json.dump(trace, f)
+        return trace
+
+
+def format_stats(stats):
+    """Return a short text summary of a SearchStats"""
+    total = sum(stats.phase_seconds.values()) or 1.0
+    phases = ", ".join(f"{phase} {seconds * 1000:.1f}ms ({seconds / total:.0%})"
+                       for phase, seconds in stats.phase_seconds.items())
+    return (f"{stats.iterations} iterations in {stats.seconds:.3f}s "
+            f"({stats.iterations_per_second():.0f}/s), {stats.new_nodes} new nodes, "
+            f"max depth {max(stats.depths) if stats.depths else 0}\n{phases}")
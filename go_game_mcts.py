@@ -1,112 +1,466 @@
 import math
-import random
-from go_game_constants import EMPTY, BOARD_SIZE
-from go_game_rules import is_suicide, remove_dead_stones
+import time
+from go_game_fast_board import FastBoard
+from go_game_rules import position_hash
+from go_game_board_logic import copy_board, place_stone
+from go_game_playout import PlayoutEngine
+from go_game_priors import ordered_indices
+
+# Shared engine used by every rollout
+playout_engine = PlayoutEngine()
+
+# How often (in iterations) a search looks at the clock and the visit margin
+CHECK_INTERVAL = 32
+
+# RAVE bias b of the minimum-MSE schedule: beta = n' / (n + n' + 4 b^2 n n'), where n' counts AMAF visits
+RAVE_BIAS = 0.1
+
+# Progressive widening: a node with n visits may have WIDENING_BASE + WIDENING_SCALE * sqrt(n)
+# children, added in order of their priors (go_game_priors)
+WIDENING_BASE = 4
+WIDENING_SCALE = 2.0
+
+def widening_limit(visits):
+    """How many children a node with this many visits may have"""
+    return WIDENING_BASE + int(WIDENING_SCALE * math.sqrt(visits))
+
+def seed_search(seed):
+    """Seed the rollout engine so that a search with a fixed iteration count is reproducible"""
+    playout_engine.rng.seed(seed)
 
 class MCTSNode:
     def __init__(self, board, player, parent=None, move=None):
         self.board = board
         self.player = player
         self.parent = parent
-        self.move = move
+        self.move = move  # The move that created this node; a node shared through the table has others
         self.children = []
+        # The move leading to each child, from this node; a shared child keeps the move of its first parent
+        self.child_moves = []
         self.wins = 0
         self.visits = 0
+        # All-moves-as-first statistics of self.move: playouts in which the parent's
+        # player played this point first anywhere after the parent, from its point of view
+        self.amaf_wins = 0
+        self.amaf_visits = 0
+        # Exact result for the player who moved into this node (1, 0 or 0.5 for a draw) once the
+        # endgame solver or a proven child settled it; a proven node is not searched below
+        self.proven = None
         self.untried_moves = self.get_legal_moves()
 
     def get_legal_moves(self):
-        """Get all legal moves for the current player"""
-        legal_moves = []
-        for y in range(BOARD_SIZE):
-            for x in range(BOARD_SIZE):
-                if self.board[y][x] == EMPTY:
-                    temp_board = [row[:] for row in self.board]
-                    if not is_suicide(temp_board, x, y, self.player):
-                        legal_moves.append((x, y))
-        return legal_moves
-
-    def expand(self):
-        """Expand the node by choosing an untried move and creating a new child node"""
+        """
+        Get all legal moves for the current player, ordered so that expand pops
+        the move with the highest prior first
+        """
+        board = self.board if isinstance(self.board, FastBoard) else FastBoard.from_list(self.board)
+        return [board.coords(i) for i in reversed(ordered_indices(board, self.player))]
+
+    def key(self):
+        """Transposition table key: position hash plus the player to move"""
+        return position_hash(self.board), self.player
+
+    def expand(self, table=None):
+        """
+        Expand the node by choosing an untried move and creating a new child node.
+        With a transposition table, a position already searched through another
+        move order is linked in as the child instead of being created again.
+        """
         if self.untried_moves:
             move = self.untried_moves.pop()
             x, y = move
-            new_board = [row[:] for row in self.board]  # Create a new board to avoid modifying the original
-            new_board[y][x] = self.player
-            remove_dead_stones(new_board, self.player)
-            child = MCTSNode(new_board, 3 - self.player, self, move)
+            new_board = copy_board(self.board)  # Create a new board to avoid modifying the original
+            place_stone(new_board, x, y, self.player)
+            child = None
+            if table is not None:
+                key = (position_hash(new_board), 3 - self.player)
+                child = table.get(key)
+                if child is None:
+                    child = MCTSNode(new_board, 3 - self.player, self, move)
+                    table.put(key, child)
+            else:
+                child = MCTSNode(new_board, 3 - self.player, self, move)
             self.children.append(child)
+            self.child_moves.append(move)
             return child
         return None
 
+    def can_expand(self):
+        """Check if progressive widening lets this node add another child at its current visit count"""
+        return self.proven is None and bool(self.untried_moves) and len(self.children) < widening_limit(self.visits)
+
+    def child_move(self, child):
+        """The move that leads from this node to one of its children"""
+        return self.child_moves[self.children.index(child)]
+
+    def child_stats(self):
+        """Return {(x, y): (visits, wins)} for the children of this node"""
+        return {move: (child.visits, child.wins) for move, child in zip(self.child_moves, self.children)}
+
     def is_terminal_node(self):
         """Check if this node is a terminal node (no untried moves)"""
         return not self.untried_moves
 
-    def best_child(self, c_param=1.41):
-        """Select the best child node based on the UCB1 formula"""
-        # Limiting the number of children considered for faster selection
-        if len(self.children) > 10:  # Limit to top 10 most visited children
-            self.children = sorted(self.children, key=lambda c: c.visits, reverse=True)[:10]
-
-        choices_weights = [
-            (child.wins / child.visits) + c_param * math.sqrt((2 * math.log(self.visits) / child.visits))
-            for child in self.children
-        ]
-        return self.children[choices_weights.index(max(choices_weights))]
-
-    def rollout(self):
-        """Simulate a random game from this node to estimate its score"""
-        board = [row[:] for row in self.board]
-        current_player = self.player
-        depth = 0
-        while depth < 30:  # Limit simulation depth to 30 moves
-            legal_moves = [
-                (x, y) for y in range(BOARD_SIZE)
-                for x in range(BOARD_SIZE)
-                if board[y][x] == EMPTY and not is_suicide(board, x, y, current_player)
-            ]
-            if not legal_moves:
-                break
-            x, y = random.choice(legal_moves)
-            board[y][x] = current_player
-            remove_dead_stones(board, current_player)
-            current_player = 3 - current_player
-            depth += 1
-        return self.simulate_score(board)
-
-    def simulate_score(self, board):
-        """A simple simulation to estimate the winner based on the number of stones"""
-        black_stones = sum(row.count('B') for row in board)
-        white_stones = sum(row.count('W') for row in board)
-        return 1 if (self.player == 'B' and black_stones > white_stones) or (self.player == 'W' and white_stones > black_stones) else 0
+    def best_child(self, c_param=1.41, rave=False):
+        """
+        Select the best child node based on the UCB1 formula. Progressive widening
+        keeps the child list short, so every child is scored and none is dropped.
+        One pass over the children, with the parent's log term computed once; the
+        first child wins ties.
+        """
+        if rave:
+            return self.best_rave_child(c_param)
+
+        log_visits = math.log(self.visits)
+        best = None
+        best_weight = None
+        for child in self.children:
+            visits = child.visits
+            weight = child.wins / visits + c_param * math.sqrt(2 * log_visits / visits)
+            if best_weight is None or weight > best_weight:
+                best, best_weight = child, weight
+        return best
+
+    def best_rave_child(self, c_param=1.41):
+        """
+        Select with UCB1 on a blend of the child's own win rate and its AMAF win rate.
+        The AMAF weight beta starts near 1 and fades as the child's own visits grow.
+        """
+        log_visits = math.log(self.visits)
+        bias = 4 * RAVE_BIAS * RAVE_BIAS
+        best = None
+        best_weight = None
+        for child in self.children:
+            value = child.wins / child.visits
+            amaf = child.amaf_visits
+            if amaf:
+                beta = amaf / (child.visits + amaf + bias * child.visits * amaf)
+                value = (1 - beta) * value + beta * child.amaf_wins / amaf
+            weight = value + c_param * math.sqrt(2 * log_visits / child.visits)
+            if best_weight is None or weight > best_weight:
+                best, best_weight = child, weight
+        return best
+
+    def rollout(self, solver=None, deadline=None):
+        """
+        Play a random game to the end from this node and return 1 if the player
+        who moved into this node wins, else 0 (the value its parent maximises).
+        A proven node returns its exact result. With an EndgameSolver
+        (go_game_solver), a leaf small enough for solve_leaf is solved instead and
+        the result kept as proven (0.5 for a draw); it falls back to a playout when
+        the solve gives up or passes the search deadline.
+        """
+        if self.proven is not None:
+            playout_engine.moves = []  # No playout moves for the AMAF update
+            return self.proven
+        board = self.board if isinstance(self.board, FastBoard) else FastBoard.from_list(self.board)
+        if solver is not None:
+            result = solver.solve_leaf(board, self.player, deadline)
+            if result is not None:
+                playout_engine.moves = []
+                self.proven = result
+                return result
+        winner = playout_engine.playout(board, self.player)
+        return 1 if winner != self.player else 0
 
     def backpropagate(self, result):
-        """Backpropagate the result of the simulation to update the node statistics"""
-        self.visits += 1
-        self.wins += result
-        if self.parent:
-            self.parent.backpropagate(1 - result)
+        """
+        Backpropagate the result of the simulation up the parent pointers, in a
+        loop so deep trees do not hit the recursion limit. The search itself uses
+        backpropagate_path, which follows the path actually taken.
+        """
+        node = self
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1 - result
+            node = node.parent
+
+def backpropagate_path(path, result):
+    """
+    Backpropagate a result along the selection path (root first, leaf last).
+    Nodes shared through the transposition table have several parents, so the
+    path taken, not the parent pointers, decides which nodes are updated.
+    """
+    for node in reversed(path):
+        node.visits += 1
+        node.wins += result
+        result = 1 - result
+
+def prove_path(path):
+    """
+    A leaf proven a win for the player who moved into it gives that player a
+    winning move at the parent, so the parent is proven a loss for whoever moved
+    into it; selection then stops there instead of searching its other moves.
+    """
+    if len(path) > 1 and path[-1].proven == 1:
+        path[-2].proven = 0
+
+def backpropagate_rave(path, result, moves):
+    """
+    Backpropagate like backpropagate_path and also update the AMAF statistics.
+    At every node, each child whose move the node's player played first anywhere
+    later in the iteration (further down the path or in the playout) counts the
+    result as if it had been played right away. moves are the playout's
+    ((x, y), color) in playing order.
+    """
+    first = {}  # move -> color that played it first after the current node
+    for move, color in reversed(moves):
+        first[move] = color
+    for i in range(len(path) - 1, -1, -1):
+        node = path[i]
+        node.visits += 1
+        node.wins += result
+        if node.children:
+            player = node.player
+            win = 1 - result  # result is for the player who moved into node
+            for move, child in zip(node.child_moves, node.children):
+                if first.get(move) == player:
+                    child.amaf_visits += 1
+                    child.amaf_wins += win
+        if i:
+            parent = path[i - 1]
+            first[parent.child_move(node)] = parent.player
+        result = 1 - result
+
+def playout_moves(board):
+    """The moves of the last rollout as ((x, y), color), converted from playout_engine.moves"""
+    stride = len(board) + 1
+    moves = []
+    for i, color in playout_engine.moves:
+        y, x = divmod(i, stride)
+        moves.append(((x - 1, y - 1), color))
+    return moves
 
-def mcts(root, iter_limit=100):
-    """Perform Monte Carlo Tree Search to find the best move"""
-    for _ in range(iter_limit):
-        node = root
+def add_virtual_loss(path):
+    """Count a pending playout as a lost visit along the path, so other selections avoid it"""
+    for node in path:
+        node.visits += 1
 
-        # Selection: Traverse the tree to select the most promising node
-        while node.children and not node.untried_moves:
-            if node.is_terminal_node():  # Check if it's a terminal node
-                break  # Avoid going deeper in the tree if it's a terminal node
-            node = node.best_child()
+def revert_virtual_loss(path):
+    """Undo add_virtual_loss once the playout result is known"""
+    for node in path:
+        node.visits -= 1
 
-        # Expansion: Expand the node if there are untried moves
-        if node.untried_moves:
-            node = node.expand()
+def detach_subtree(root):
+    """
+    Make root the top of its own tree and return every node reachable from it.
+    Parent pointers that lead out of the subtree (the new root's, and those of
+    nodes first created under a parent that is no longer reachable) are cleared,
+    so nothing in the subtree keeps the rest of the old tree alive.
+    """
+    root.parent = None
+    seen = {id(root)}
+    nodes = [root]
+    k = 0
+    while k < len(nodes):
+        for child in nodes[k].children:
+            if id(child) not in seen:
+                seen.add(id(child))
+                nodes.append(child)
+        k += 1
+    for node in nodes:
+        if node.parent is not None and id(node.parent) not in seen:
+            node.parent = None
+    return nodes
 
-        # Simulation: Simulate a random game from the expanded node
-        result = node.rollout()
+def find_subtree(root, board_hash, player, max_depth=2):
+    """
+    Look through the first max_depth plies below root (breadth first) for the node
+    of the given position hash and player to move, and return it or None.
+    """
+    level = [root]
+    for _ in range(max_depth + 1):
+        for node in level:
+            if node.player == player and position_hash(node.board) == board_hash:
+                return node
+        level = [child for node in level for child in node.children]
+    return None
 
-        # Backpropagation: Update the node statistics based on the simulation result
-        node.backpropagate(result)
+def select(root, rave=False):
+    """Descend from the root with best_child to a node that may add a child (or has none) and return the path"""
+    node = root
+    path = [node]
+
+    # Selection: Traverse the tree to select the most promising node
+    # (a node whose children are at the widening limit must not stop the descent,
+    # a proven one must: its result is known without searching below it)
+    while node.proven is None and node.children and not node.can_expand():
+        child = node.best_child(rave=rave)
+        if child in path:
+            # Nodes shared through a transposition table can lead back to a position
+            # on the path (the table ignores superko history); play out from here
+            break
+        node = child
+        path.append(node)
+    return path
+
+def expand_path(path, table=None):
+    """Expansion: Expand the last node of the path if widening allows it, appending the new child"""
+    node = path[-1]
+    if node.can_expand():
+        path.append(node.expand(table))
+    return path
+
+def select_and_expand(root, table=None, rave=False):
+    """Descend from the root with best_child, expand the node reached and return the path to the new leaf"""
+    return expand_path(select(root, rave), table)
+
+def run_iteration(root, table=None, rave=False, solver=None, deadline=None):
+    """One search iteration: select, expand, roll out and backpropagate"""
+    path = select_and_expand(root, table, rave)
+
+    # Simulation: Simulate a random game from the expanded node
+    leaf = path[-1]
+    result = leaf.rollout(solver, deadline)
+    prove_path(path)
+
+    # Backpropagation: Update the node statistics based on the simulation result
+    if rave:
+        backpropagate_rave(path, result, playout_moves(leaf.board))
+    else:
+        backpropagate_path(path, result)
+
+def timed_iteration(root, table, stats, rave=False, solver=None, deadline=None):
+    """One search iteration with each phase timed into a SearchStats"""
+    clock = time.perf_counter
+    t0 = clock()
+    path = select(root, rave)
+    t1 = clock()
+    selected = len(path)
+    expand_path(path, table)
+    t2 = clock()
+    leaf = path[-1]
+    new_node = len(path) > selected and leaf.visits == 0  # A node reached through the table already has visits
+    result = leaf.rollout(solver, deadline)
+    prove_path(path)
+    t3 = clock()
+    if rave:
+        backpropagate_rave(path, result, playout_moves(leaf.board))
+    else:
+        backpropagate_path(path, result)
+    t4 = clock()
+    stats.record_iteration(path, new_node, (t0, t1, t2, t3, t4))
+
+def can_stop_early(root, remaining, child_visits=None):
+    """
+    Check if the most visited root move keeps the lead even if every remaining
+    iteration goes elsewhere. child_visits replaces the visits of root.children
+    for tree stores that do not keep node objects.
+    """
+    if child_visits is None:
+        child_visits = [child.visits for child in root.children]
+    first = second = 0
+    for visits in child_visits:
+        if visits > first:
+            first, second = visits, first
+        elif visits > second:
+            second = visits
+    return first - second > remaining
+
+def should_stop(root, done, iter_limit, deadline, start, child_visits=None):
+    """
+    Check if a search that has run done iterations since start should stop:
+    the deadline has passed, or the top move can no longer be overtaken within
+    the iterations left (estimated from the search rate when there is a deadline).
+    """
+    remaining = None if iter_limit is None else iter_limit - done
+    if deadline is not None:
+        now = time.time()
+        if now >= deadline:
+            return True
+        rate = done / max(now - start, 1e-9)
+        estimate = rate * (deadline - now)
+        remaining = estimate if remaining is None else min(remaining, estimate)
+    return can_stop_early(root, remaining, child_visits)
+
+def most_visited_move(root):
+    """
+    Return the move of the most visited root child, or None (pass) if there is
+    none. Ties go to the last such child, as the stable sort this replaces did.
+    A child proven a win for the root player is played whatever its visits.
+    """
+    best = None
+    best_move = None
+    for move, child in zip(root.child_moves, root.children):
+        if child.proven == 1:
+            return move
+        if best is None or child.visits >= best.visits:
+            best, best_move = child, move
+    return best_move
+
+def mcts(root, iter_limit=100, batch_size=None, deadline=None, table=None, stats=None, rave=False, solver=None):
+    """
+    Perform Monte Carlo Tree Search to find the best move.
+
+    Runs iter_limit iterations, or until time.time() reaches deadline when
+    iter_limit is None, and stops early once the best move is settled.
+    With batch_size set, leaves are collected in batches under virtual loss and
+    played out together by the NumPy backend in go_game_batch_playout.
+    With a TranspositionTable, transposed positions share one node.
+    With a SearchStats (go_game_instrumentation), every phase is timed and counted.
+    With rave, every playout also updates the AMAF statistics of the children
+    along the path and selection blends them in (RAVE).
+    With an EndgameSolver, leaves with few empty points get their proven result
+    instead of a playout.
+    The batched search supports none of these three and raises ValueError when
+    given one.
+    """
+    if batch_size and (stats is not None or rave or solver is not None):
+        raise ValueError("the batched search does not support stats, rave or an endgame solver")
+    if table is not None:
+        table.put(root.key(), root)
+    if batch_size:
+        return mcts_batched(root, iter_limit, batch_size, deadline=deadline, table=table)
+
+    if stats is not None:
+        stats.begin()
+    start = time.time()
+    done = 0
+    while iter_limit is None or done < iter_limit:
+        if done and done % CHECK_INTERVAL == 0 and should_stop(root, done, iter_limit, deadline, start):
+            break
+        if stats is not None:
+            timed_iteration(root, table, stats, rave, solver, deadline)
+        else:
+            run_iteration(root, table, rave, solver, deadline)
+        done += 1
 
     # Return the best move based on the most visited child node
-    return sorted(root.children, key=lambda c: c.visits)[-1].move if root.children else None
+    move = most_visited_move(root)
+    if stats is not None:
+        stats.end(root, move)
+    return move
+
+def mcts_batched(root, iter_limit, batch_size, rng=None, deadline=None, table=None):
+    """Run the search like mcts, playing the leaves out batch_size at a time"""
+    import numpy as np
+    from go_game_batch_playout import batch_playouts, boards_to_array
+    from go_game_constants import BLACK, WHITE
+
+    rng = rng or np.random.default_rng()
+    start = time.time()
+    done = 0
+    while iter_limit is None or done < iter_limit:
+        if done and should_stop(root, done, iter_limit, deadline, start):
+            break
+        paths = []
+        for _ in range(batch_size if iter_limit is None else min(batch_size, iter_limit - done)):
+            path = select_and_expand(root, table)
+            add_virtual_loss(path)
+            paths.append(path)
+        done += len(paths)
+
+        leaves = [path[-1] for path in paths]
+        scores = batch_playouts(boards_to_array([leaf.board for leaf in leaves]),
+                                [leaf.player for leaf in leaves], rng, komi=playout_engine.komi)
+        for path, leaf, score in zip(paths, leaves, scores):
+            revert_virtual_loss(path)
+            if score == 0:
+                result = 0.5  # A drawn playout (integer komi) is half a win for both sides
+            else:
+                winner = BLACK if score > 0 else WHITE
+                result = 1 if winner != leaf.player else 0
+            backpropagate_path(path, result)
+
+    return most_visited_move(root)
@@ -0,0 +1,247 @@
+# go_game_opening_book.py
+
+import argparse
+import mmap
+import os
+import random
+import struct
+from go_game_constants import BOARD_SIZE, BLACK, WHITE, EMPTY
+from go_game_fast_board import FastBoard
+from go_game_mcts import MCTSNode, mcts, seed_search
+from go_game_records import read_games, replay
+from go_game_zobrist import get_zobrist_table
+
+# Book file written next to the game; GoAI and the GUI use it when it exists
+DEFAULT_BOOK_PATH = "go_game_book.bin"
+
+BOOK_MAGIC = b"GOBK"
+BOOK_VERSION = 1
+HEADER = struct.Struct("<4sHHI")  # magic, version, board size, number of entries
+ENTRY = struct.Struct("<QBxHIf")  # canonical hash, player to move, move point (x + y * size), visits, wins
+
+SYMMETRIES = 8  # Rotations and reflections of the square board
+
+_symmetry_maps = {}
+
+
+def transform(x, y, symmetry, size):
+    """Apply one of the 8 board symmetries (0 is the identity) to the point (x, y)"""
+    if symmetry & 4:
+        x, y = y, x
+    if symmetry & 1:
+        x = size - 1 - x
+    if symmetry & 2:
+        y = size - 1 - y
+    return x, y
+
+
+def inverse_transform(x, y, symmetry, size):
+    """Undo transform for the same symmetry"""
+    if symmetry & 1:
+        x = size - 1 - x
+    if symmetry & 2:
+        y = size - 1 - y
+    if symmetry & 4:
+        x, y = y, x
+    return x, y
+
+
+def symmetry_maps(size):
+    """For every symmetry, a list mapping each padded FastBoard index to the index of its image"""
+    maps = _symmetry_maps.get(size)
+    if maps is None:
+        stride = size + 1
+        maps = []
+        for symmetry in range(SYMMETRIES):
+            index_map = [0] * ((size + 2) * stride + 1)
+            for y in range(size):
+                for x in range(size):
+                    tx, ty = transform(x, y, symmetry, size)
+                    index_map[(y + 1) * stride + x + 1] = (ty + 1) * stride + tx + 1
+            maps.append(index_map)
+        _symmetry_maps[size] = maps
+    return maps
+
+
+def canonical_hash(board):
+    """
+    Return (hash, symmetry) for a FastBoard: the smallest Zobrist hash over the
+    8 symmetric images of the position, and the symmetry that produces it.
+    Symmetric positions share one hash, so one book entry covers all of them.
+    """
+    zobrist = get_zobrist_table(board.size)
+    cells = board.cells
+    stones = [(i, cells[i]) for i in board.points if cells[i] != EMPTY]
+    best = None
+    best_symmetry = 0
+    for symmetry, index_map in enumerate(symmetry_maps(board.size)):
+        h = 0
+        for i, color in stones:
+            h ^= zobrist[color][index_map[i]]
+        if best is None or h < best:
+            best, best_symmetry = h, symmetry
+    return best, best_symmetry
+
+
+class OpeningBook:
+    """
+    Read-only opening book: the best move and its search statistics for known
+    positions, keyed by canonical hash and player to move.
+
+    The file is a small header followed by fixed-size entries sorted by key.
+    It is memory-mapped rather than read, so opening a book costs no parsing and
+    a lookup is a binary search that touches a handful of entries.
+    """
+
+    def __init__(self, path=DEFAULT_BOOK_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {BOOK_VERSION} opening book")
+
+    def __len__(self):
+        return self.count
+
+    def _entry(self, k):
+        return ENTRY.unpack_from(self.data, HEADER.size + k * ENTRY.size)
+
+    def lookup(self, board, player):
+        """
+        Return (move, visits, wins) for the position on a FastBoard with player to
+        move, with the move mapped back onto this board's orientation, or None.
+        """
+        if board.size != self.size or not self.count:
+            return None
+        key, symmetry = canonical_hash(board)
+        target = (key, player)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[:2] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == self.count:
+            return None
+        h, p, point, visits, wins = self._entry(lo)
+        if (h, p) != target:
+            return None
+        y, x = divmod(point, self.size)
+        return inverse_transform(x, y, symmetry, self.size), visits, wins
+
+    def best_move(self, board, player):
+        """The book move for the position if there is one and it is legal here (superko), else None"""
+        hit = self.lookup(board, player)
+        if hit is None:
+            return None
+        (x, y), _, _ = hit
+        return (x, y) if board.is_legal_index(board.index(x, y), player) else None
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+            self.data = None
+        self._file.close()
+
+
+class BookBuilder:
+    """Collects root visit statistics per canonical position and writes them as an OpeningBook file"""
+
+    def __init__(self, size=BOARD_SIZE):
+        self.size = size
+        self.positions = {}  # (hash, player) -> {point: [visits, wins]} in canonical orientation
+
+    def __len__(self):
+        return len(self.positions)
+
+    def add(self, board, player, root_visits):
+        """Add the {(x, y): (visits, wins)} of the root children of a search of the position on a FastBoard"""
+        key, symmetry = canonical_hash(board)
+        stats = self.positions.setdefault((key, player), {})
+        for (x, y), (visits, wins) in root_visits.items():
+            cx, cy = transform(x, y, symmetry, self.size)
+            totals = stats.setdefault(cy * self.size + cx, [0, 0.0])
+            totals[0] += visits
+            totals[1] += wins
+
+    def add_games(self, records, depth=8):
+        """
+        Add the first depth moves of recorded games (go_game_records) that carry
+        search statistics, each credited with the root visits of its search.
+        """
+        for record in records:
+            if record.size != self.size:
+                continue
+            for k, (board, color, move, stats) in enumerate(replay(record)):
+                if k >= depth:
+                    break
+                if move is not None and stats and stats.get("visits") and stats.get("winrate") is not None:
+                    visits = stats["visits"]
+                    self.add(board, color, {move: (visits, visits * stats["winrate"])})
+
+    def write(self, path=DEFAULT_BOOK_PATH, min_visits=1):
+        """
+        Write the most visited move of every position with at least min_visits
+        visits on it, replacing the file in one step. Returns the number of entries.
+        """
+        rows = []
+        for (key, player), stats in self.positions.items():
+            point, (visits, wins) = max(stats.items(), key=lambda item: item[1][0])
+            if visits >= min_visits:
+                rows.append((key, player, point, visits, wins))
+        rows.sort()
+        temp = path + ".tmp"
+        with open(temp, "wb") as f:
+            f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, self.size, len(rows)))
+            for row in rows:
+                f.write(ENTRY.pack(*row))
+        os.replace(temp, path)
+        return len(rows)
+
+
+def build_book(path=DEFAULT_BOOK_PATH, games=20, depth=8, simulations=2000, size=BOARD_SIZE, seed=0, min_visits=100,
+               game_files=()):
+    """
+    Fill a book offline from self-play: in each game the first depth positions are
+    searched with simulations iterations and their root statistics added, then a
+    move is drawn among the searched ones (weighted by visits squared, so the
+    games branch out without playing weak moves). Recorded games in game_files
+    (SGF or binary records) are added too. Returns the number of entries.
+    """
+    rng = random.Random(seed)
+    seed_search(seed)
+    builder = BookBuilder(size)
+    for game_file in game_files:
+        builder.add_games(read_games(game_file), depth)
+    for _ in range(games):
+        board = FastBoard(size)
+        player = BLACK
+        for _ in range(depth):
+            root = MCTSNode(board.copy(), player)
+            mcts(root, simulations)
+            if not root.children:
+                break
+            builder.add(board, player, root.child_stats())
+            k = rng.choices(range(len(root.children)), weights=[child.visits ** 2 for child in root.children])[0]
+            board.place_stone(*root.child_moves[k], player)
+            player = WHITE if player == BLACK else BLACK
+    return builder.write(path, min_visits)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build an opening book from self-play")
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--depth", type=int, default=8, help="moves from the start of each game to search")
+    parser.add_argument("--simulations", type=int, default=2000)
+    parser.add_argument("--min-visits", type=int, default=100)
+    parser.add_argument("--size", type=int, default=BOARD_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--from-games", nargs="*", default=(), help="SGF or binary game records to add as well")
+    args = parser.parse_args()
+    entries = build_book(args.output, args.games, args.depth, args.simulations, args.size, args.seed, args.min_visits,
+                         args.from_games)
+    print(f"Wrote {entries} positions to {args.output}")
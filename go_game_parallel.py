@@ -0,0 +1,159 @@
+# go_game_parallel.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from go_game_constants import BLACK
+from go_game_fast_board import FastBoard
+from go_game_mcts import (MCTSNode, add_virtual_loss, backpropagate_path, mcts, playout_engine, revert_virtual_loss,
+                          seed_search, select_and_expand)
+
+ROOT_PARALLEL = "root"
+TREE_PARALLEL = "tree"
+
+
+def _search_tree(board, player, iterations, seed, deadline=None, komi=6.5):
+    """Worker: grow an independent tree and return its root statistics per move"""
+    seed_search(seed)
+    playout_engine.komi = komi
+    root = MCTSNode(board, player)
+    mcts(root, iter_limit=iterations, deadline=deadline)
+    return root.child_stats()
+
+
+def _play_leaves(jobs, komi=6.5):
+    """Worker: play out a chunk of (board, player, seed) leaves and return a result per leaf"""
+    playout_engine.komi = komi
+    results = []
+    for board, player, seed in jobs:
+        playout_engine.rng.seed(seed)
+        winner = playout_engine.playout(board, player)
+        results.append(1 if winner != player else 0)
+    return results
+
+
+def merge_root_stats(stats):
+    """Sum per-move (visits, wins) dicts from several trees"""
+    merged = {}
+    for tree in stats:
+        for move, (visits, wins) in tree.items():
+            total_visits, total_wins = merged.get(move, (0, 0))
+            merged[move] = (total_visits + visits, total_wins + wins)
+    return merged
+
+
+def best_merged_move(merged):
+    """Most visited move; ties go to the smaller coordinates so the pick does not depend on dict order"""
+    if not merged:
+        return None
+    return max(sorted(merged), key=lambda move: merged[move][0])
+
+
+def root_parallel_search(executor, board, player, iterations, workers, seed=0, deadline=None, komi=6.5):
+    """
+    Root parallelism: every worker grows its own tree from the same position with
+    its own seed and the root visit counts are summed. Worker i always receives
+    seed + i and the same share of iterations, so without a deadline the result
+    only depends on the seed and the worker count.
+    """
+    if iterations is None:
+        shares = [None] * workers
+    else:
+        shares = [iterations // workers + (1 if i < iterations % workers else 0) for i in range(workers)]
+    futures = [executor.submit(_search_tree, board, player, share, seed + i, deadline, komi)
+               for i, share in enumerate(shares) if share is None or share]
+    merged = merge_root_stats(future.result() for future in futures)
+    return best_merged_move(merged), merged
+
+
+def tree_parallel_search(executor, board, player, iterations, workers, seed=0, leaves_per_worker=8,
+                         deadline=None, komi=6.5):
+    """
+    Tree parallelism: one shared tree in this process. Each round selects
+    workers * leaves_per_worker leaves one after another under virtual loss, so
+    the selections spread out, then plays them out across the pool and
+    backpropagates in selection order. Each leaf gets its own seed from a counter,
+    so the search is reproducible for a given seed and worker count.
+    """
+    root = MCTSNode(board, player)
+    counter = 0
+    done = 0
+    round_size = workers * leaves_per_worker
+    while iterations is None or done < iterations:
+        if deadline is not None and time.time() >= deadline:
+            break
+        paths = []
+        for _ in range(round_size if iterations is None else min(round_size, iterations - done)):
+            path = select_and_expand(root)
+            add_virtual_loss(path)
+            paths.append(path)
+        done += len(paths)
+
+        jobs = []
+        for path in paths:
+            leaf = path[-1]
+            jobs.append((leaf.board, leaf.player, seed * 1000003 + counter))
+            counter += 1
+        chunks = [jobs[i::workers] for i in range(workers)]
+        futures = [executor.submit(_play_leaves, chunk, komi) for chunk in chunks if chunk]
+
+        # Chunk i holds leaves i, i + workers, ...; put the results back in order
+        results = [None] * len(paths)
+        for i, future in enumerate(futures):
+            results[i::workers] = future.result()
+        for path, result in zip(paths, results):
+            revert_virtual_loss(path)
+            backpropagate_path(path, result)
+
+    merged = root.child_stats()
+    return best_merged_move(merged), merged
+
+
+def parallel_search(board, player, iterations, workers=None, mode=ROOT_PARALLEL, seed=0, executor=None,
+                    deadline=None, komi=6.5):
+    """
+    Search the position on several cores and return (best_move, {move: (visits, wins)}).
+
+    :param iterations: total iterations, or None to search until the deadline
+    :param workers: number of worker processes, default os.cpu_count()
+    :param mode: ROOT_PARALLEL (independent trees) or TREE_PARALLEL (shared tree, virtual loss)
+    :param executor: an existing ProcessPoolExecutor to reuse between calls
+    :param deadline: time.time() value at which the search stops
+    :param komi: komi the playouts score with
+    """
+    workers = workers or os.cpu_count() or 1
+    if not isinstance(board, FastBoard):
+        board = FastBoard.from_list(board)
+    owned = executor is None
+    if owned:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if mode == TREE_PARALLEL:
+            return tree_parallel_search(executor, board, player, iterations, workers, seed, deadline=deadline,
+                                        komi=komi)
+        return root_parallel_search(executor, board, player, iterations, workers, seed, deadline=deadline, komi=komi)
+    finally:
+        if owned:
+            executor.shutdown()
+
+
+def measure_scaling(iterations=4000, max_workers=None, mode=ROOT_PARALLEL, seed=0):
+    """Return [(workers, seconds, iterations_per_second, speedup)] for 1 .. max_workers processes"""
+    max_workers = max_workers or os.cpu_count() or 1
+    board = FastBoard()
+    rows = []
+    for workers in range(1, max_workers + 1):
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parallel_search(board, BLACK, workers, workers, mode, seed, executor)  # Warm up the workers
+            start = time.perf_counter()
+            parallel_search(board, BLACK, iterations, workers, mode, seed, executor)
+            elapsed = time.perf_counter() - start
+        rate = iterations / elapsed
+        rows.append((workers, elapsed, rate, rate / rows[0][2] if rows else 1.0))
+    return rows
+
+
+if __name__ == "__main__":
+    for mode in (ROOT_PARALLEL, TREE_PARALLEL):
+        for workers, elapsed, rate, speedup in measure_scaling(mode=mode):
+            print(f"{mode:>4} workers={workers}: {elapsed:.2f}s, {rate:.0f} iterations/sec, {speedup:.2f}x")
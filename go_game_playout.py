@@ -0,0 +1,170 @@
+# go_game_playout.py
+
+import random
+import time
+from go_game_constants import EMPTY, BLACK, WHITE
+from go_game_fast_board import FastBoard
+from go_game_scoring import area_counts
+
+# A playout stops once one side leads by more than this share of the board in stones (komi included)
+MERCY_FRACTION = 0.3
+
+
+def area_score(board, komi=6.5):
+    """
+    Return black's area score minus white's (komi included) for a finished playout,
+    using the same Tromp-Taylor scorer as calculate_score but without its cache,
+    since playout positions almost never repeat.
+    """
+    black, white = area_counts(board.cells, board.points, board.neighbors)
+    return black - white - komi
+
+
+def is_eye(board, i, color):
+    """
+    Check if the empty index i is a single-point eye of color: every neighbour is
+    a friendly stone and the opponent holds at most one diagonal (none on the edge).
+    """
+    cells = board.cells
+    for n in board.neighbors[i]:
+        if cells[n] != color:
+            return False
+    opponent = BLACK if color == WHITE else WHITE
+    diagonals = board.diagonals[i]
+    enemies = 0
+    for d in diagonals:
+        if cells[d] == opponent:
+            enemies += 1
+    return enemies == 0 if len(diagonals) < 4 else enemies < 2
+
+
+class PlayoutEngine:
+    """
+    Plays random games to the end on a private copy of a FastBoard.
+
+    The empty points of the playout board are kept in a list together with each
+    point's position in it, so placing and capturing update the set in O(1) per
+    stone. Moves are drawn by sampling that list and rejecting illegal points, a
+    player never fills its own single-point eye, and the game ends when both
+    sides pass in a row. Playouts use simple ko rather than superko.
+
+    The stone difference is kept up to date move by move, and a game that one
+    side leads by more than mercy_fraction of the board in stones is stopped
+    as decided (the mercy rule); it is scored by that stone difference instead
+    of being played out. mercy_fraction=None always plays to the end.
+    """
+
+    def __init__(self, komi=6.5, rng=None, mercy_fraction=MERCY_FRACTION):
+        self.komi = komi
+        self.rng = rng or random.Random()
+        self.mercy_fraction = mercy_fraction
+        self.mercy_stops = 0  # Playouts ended early by the mercy rule
+        self.playouts = 0
+        self.moves = []  # (index, color) of every move in the last playout
+
+    def playout(self, board, player):
+        """Play a random game from the position with player to move and return the winning color."""
+        board = board.copy()
+        return BLACK if self.run(board, player) > 0 else WHITE
+
+    def run(self, board, player):
+        """
+        Play the board out in place and return its final area score (black minus
+        white, komi included), or the stone difference minus komi if the mercy rule
+        stopped it.
+        """
+        cells = board.cells
+        group_of = board.group_of
+        group_libs = board.group_libs
+        randrange = self.rng.randrange
+        empty = [i for i in board.points if cells[i] == EMPTY]
+        where = [0] * len(cells)
+        for k, i in enumerate(empty):
+            where[i] = k
+
+        # Black stones minus white stones minus komi, and how far it may swing before the game counts as decided
+        lead = len(board.points) - len(empty) - 2 * sum(1 for i in board.points if cells[i] == WHITE) - self.komi
+        mercy = len(board.points) * self.mercy_fraction if self.mercy_fraction is not None else len(cells)
+
+        moves = []
+        max_moves = 3 * len(board.points)
+        color = player
+        ko = 0
+        passes = 0
+        while passes < 2 and len(moves) < max_moves:
+            if lead > mercy or lead < -mercy:
+                self.moves = moves
+                self.playouts += 1
+                self.mercy_stops += 1
+                return lead
+            opponent = BLACK if color == WHITE else WHITE
+
+            # Sample empty points until one is legal, moving rejected ones past the end
+            move = 0
+            n = len(empty)
+            while n:
+                k = randrange(n)
+                i = empty[k]
+                if i != ko and not is_eye(board, i, color) and not board.is_suicide_index(i, color):
+                    move = i
+                    break
+                n -= 1
+                last = empty[n]
+                empty[k] = last
+                where[last] = k
+                empty[n] = i
+                where[i] = n
+
+            if not move:
+                passes += 1
+                ko = 0
+                color = opponent
+                continue
+            passes = 0
+
+            captured = board._place(move, color)
+            moves.append((move, color))
+            if color == BLACK:
+                lead += 1 + len(captured)
+            else:
+                lead -= 1 + len(captured)
+
+            # Swap-remove the played point and give captured points back
+            last = empty.pop()
+            if last != move:
+                k = where[move]
+                empty[k] = last
+                where[last] = k
+            for s in captured:
+                where[s] = len(empty)
+                empty.append(s)
+
+            # A lone stone that captured exactly one stone and sits in atari sets a ko
+            ko = 0
+            if len(captured) == 1:
+                gid = group_of[move]
+                if len(board.group_stones[gid]) == 1 and len(group_libs[gid]) == 1:
+                    ko = captured[0]
+            color = opponent
+
+        self.moves = moves
+        self.playouts += 1
+        return area_score(board, self.komi)
+
+
+def measure_playouts_per_second(board=None, player=BLACK, seconds=2.0, seed=0, mercy_fraction=MERCY_FRACTION):
+    """Run playouts from a position for the given time and return playouts per second."""
+    if board is None:
+        board = FastBoard()
+    engine = PlayoutEngine(rng=random.Random(seed), mercy_fraction=mercy_fraction)
+    start = time.perf_counter()
+    count = 0
+    while time.perf_counter() - start < seconds:
+        engine.playout(board, player)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    print(f"{measure_playouts_per_second():.0f} playouts/sec on an empty board")
+    print(f"{measure_playouts_per_second(mercy_fraction=None):.0f} playouts/sec without the mercy rule")
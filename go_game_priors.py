@@ -0,0 +1,131 @@
+# go_game_priors.py
+
+from itertools import product
+from go_game_constants import EMPTY, BLACK, WHITE
+from go_game_geometry import OFFBOARD
+
+# Prior scores added per feature; a move's prior is the sum of its features
+CAPTURE_PRIOR = 4         # Takes an opponent group that is in atari
+ATARI_ESCAPE_PRIOR = 3    # Gives a friendly group in atari at least two liberties
+PATTERN_PRIOR = 1         # Surroundings match one of the 3x3 PATTERNS
+SELF_ATARI_PRIOR = -2     # Leaves the new stone's group with a single liberty
+
+# Classic 3x3 shape patterns (the MoGo set) around an empty centre point, in rows
+# from top to bottom. X and O are stones of the two colors, in either assignment;
+# x is anything but an X stone, o anything but an O stone, '.' an empty point,
+# '?' anything and ' ' the off-board padding.
+PATTERNS = (
+    ("XOX", "...", "???"),  # Hane: enclosing hane
+    ("XO.", "...", "?.?"),  # Hane: non-cutting hane
+    ("XO?", "X..", "x.?"),  # Hane: magari
+    (".O.", "X..", "..."),  # Katatsuke or diagonal attachment
+    ("XO?", "O.o", "?o?"),  # Cut: unprotected cut
+    ("XO?", "O.X", "???"),  # Cut: peeped cut
+    ("?X?", "O.O", "ooo"),  # Cut: de (pushing between two stones)
+    ("OX?", "o.O", "???"),  # Cut: keima cut
+    ("X.?", "O.?", "   "),  # Edge: chase
+    ("OX?", "X.O", "   "),  # Edge: block side cut
+    ("?X?", "x.O", "   "),  # Edge: block side connection
+    ("?XO", "x.x", "   "),  # Edge: sagari
+    ("?OX", "X.O", "   "),  # Edge: cut
+)
+
+# The eight neighbours of the centre, in the order their cells fill a pattern key
+RING = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def _symmetries(rows):
+    """The eight rotations and reflections of a 3x3 pattern"""
+    grid = [list(row) for row in rows]
+    for _ in range(4):
+        grid = [list(row) for row in zip(*grid[::-1])]  # Rotate a quarter turn
+        yield grid
+        yield [row[::-1] for row in grid]
+
+
+def _build_pattern_table():
+    """
+    Expand PATTERNS under every symmetry and both color assignments into a flat
+    table with one byte per 16-bit key of the eight neighbour cells (two bits each).
+    """
+    table = bytearray(1 << 16)
+    for rows in PATTERNS:
+        for grid in _symmetries(rows):
+            for x_color, o_color in ((BLACK, WHITE), (WHITE, BLACK)):
+                allowed = {
+                    "X": (x_color,),
+                    "O": (o_color,),
+                    "x": (EMPTY, o_color, OFFBOARD),
+                    "o": (EMPTY, x_color, OFFBOARD),
+                    ".": (EMPTY,),
+                    "?": (EMPTY, BLACK, WHITE, OFFBOARD),
+                    " ": (OFFBOARD,),
+                }
+                choices = [allowed[grid[1 + dy][1 + dx]] for dx, dy in RING]
+                for cells in product(*choices):
+                    key = 0
+                    for k, cell in enumerate(cells):
+                        key |= cell << (2 * k)
+                    table[key] = 1
+    return table
+
+
+PATTERN_TABLE = _build_pattern_table()
+
+
+def pattern_key(cells, i, stride):
+    """The PATTERN_TABLE key of the neighbourhood of index i on a padded cell array"""
+    key = 0
+    shift = 0
+    for dx, dy in RING:
+        key |= cells[i + dy * stride + dx] << shift
+        shift += 2
+    return key
+
+
+def move_prior(board, i, color):
+    """
+    Heuristic value of color playing at the empty index i of a FastBoard:
+    captures, atari escapes and pattern matches add to it, self-atari takes away.
+    """
+    cells = board.cells
+    group_of = board.group_of
+    group_libs = board.group_libs
+    opponent = BLACK if color == WHITE else WHITE
+    prior = 0
+    captures = False
+    in_atari = False
+    libs = set()  # Liberties of the group the new stone joins
+    for n in board.neighbors[i]:
+        stone = cells[n]
+        if stone == EMPTY:
+            libs.add(n)
+        elif stone == opponent:
+            if len(group_libs[group_of[n]]) == 1:
+                captures = True
+        else:
+            group = group_libs[group_of[n]]
+            if len(group) == 1:
+                in_atari = True
+            libs.update(group)
+    libs.discard(i)
+
+    if captures:
+        prior += CAPTURE_PRIOR
+    elif len(libs) < 2:
+        prior += SELF_ATARI_PRIOR
+    if in_atari and (captures or len(libs) > 1):
+        prior += ATARI_ESCAPE_PRIOR
+    if PATTERN_TABLE[pattern_key(cells, i, board.stride)]:
+        prior += PATTERN_PRIOR
+    return prior
+
+
+def ordered_indices(board, color):
+    """
+    Return the legal move indices of color on a FastBoard, highest prior first.
+    Moves with equal priors keep their board order.
+    """
+    moves = board.legal_indices(color)
+    priors = {i: move_prior(board, i, color) for i in moves}
+    return sorted(moves, key=lambda i: -priors[i])
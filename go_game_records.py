@@ -0,0 +1,352 @@
+# go_game_records.py
+
+import math
+import re
+import struct
+from go_game_constants import BOARD_SIZE, BLACK, WHITE
+from go_game_fast_board import FastBoard
+
+# Per-move search statistics kept in records; any of them may be missing
+STAT_KEYS = ("visits", "winrate", "seconds")
+
+SGF_COLORS = {BLACK: "B", WHITE: "W"}
+SGF_CHUNK = 1 << 16  # Characters read at a time when streaming an SGF file
+SGF_TOKEN = re.compile(r";|([A-Za-z]+)\s*((?:\[(?:\\.|[^\\\]])*\]\s*)+)", re.S)  # A node start or a property
+SGF_VALUE = re.compile(r"\[((?:\\.|[^\\\]])*)\]", re.S)
+SGF_SPECIAL = re.compile(r"[\[\]\\()]")  # The only characters that change the game tree structure
+
+# Binary records: a file header, then per game a header followed by its moves
+RECORD_MAGIC = b"GOGR"
+RECORD_VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")     # magic, version
+GAME_HEADER = struct.Struct("<BffI")    # board size, komi, result, number of moves
+MOVE = struct.Struct("<HIff")           # point | WHITE_BIT, visits, winrate, seconds
+PASS_POINT = 0x7FFF
+WHITE_BIT = 0x8000
+
+
+class GameRecord:
+    """
+    One game as a list of moves, each with the search statistics that led to it.
+
+    moves holds (color, (x, y) or None for a pass, stats) where stats is a dict
+    with some of STAT_KEYS, or None. result is black's score minus white's (komi
+    included): positive when black won, math.inf / -math.inf for a resignation,
+    and None while unknown.
+    """
+
+    def __init__(self, size=BOARD_SIZE, komi=6.5, black="Black", white="White"):
+        self.size = size
+        self.komi = komi
+        self.black = black
+        self.white = white
+        self.moves = []
+        self.result = None
+
+    def __len__(self):
+        return len(self.moves)
+
+    def add_move(self, color, move, stats=None):
+        self.moves.append((color, move, stats))
+
+
+def replay(record):
+    """
+    Yield (board, color, move, stats) for every move of a record, with the
+    FastBoard showing the position before the move. The same board is updated in
+    place as the game goes on, so copy it to keep a position. An illegal move is
+    treated as a pass.
+    """
+    board = FastBoard(record.size)
+    for color, move, stats in record.moves:
+        yield board, color, move, stats
+        if move is not None:
+            board.place_stone(move[0], move[1], color)
+
+
+def iter_positions(records):
+    """Yield (board, color, move, stats) for every move of every record, one game at a time"""
+    for record in records:
+        yield from replay(record)
+
+
+# ----------------------------------------------------------------------
+# SGF
+# ----------------------------------------------------------------------
+
+def _sgf_text(value):
+    return str(value).replace("\\", "\\\\").replace("]", "\\]")
+
+
+def _sgf_point(move):
+    return "" if move is None else chr(ord("a") + move[0]) + chr(ord("a") + move[1])
+
+
+def sgf_result(result):
+    """SGF RE value for a score difference (black minus white)"""
+    if result is None:
+        return "?"
+    if result == 0:
+        return "0"
+    winner = "B" if result > 0 else "W"
+    return f"{winner}+R" if math.isinf(result) else f"{winner}+{abs(result):g}"
+
+
+def parse_sgf_result(text):
+    """Inverse of sgf_result; results that carry no score (time, forfeit, unknown) give None"""
+    text = text.strip()
+    if text in ("0", "Draw", "Jigo"):
+        return 0.0
+    if len(text) < 3 or text[0] not in "BW" or text[1] != "+":
+        return None
+    sign = 1 if text[0] == "B" else -1
+    margin = text[2:]
+    if margin in ("R", "Resign"):
+        return sign * math.inf
+    try:
+        return sign * float(margin)
+    except ValueError:
+        return None
+
+
+def format_stats(stats):
+    """Comment text holding the statistics of one move, e.g. 'visits=512 winrate=0.563'"""
+    return " ".join(f"{key}={stats[key]:.4g}" if isinstance(stats[key], float) else f"{key}={stats[key]}"
+                    for key in STAT_KEYS if stats.get(key) is not None)
+
+
+def parse_stats(comment):
+    """Read back the statistics written by format_stats; other comment text is ignored"""
+    stats = {}
+    for word in comment.split():
+        key, _, value = word.partition("=")
+        if key in STAT_KEYS and value:
+            try:
+                stats[key] = int(value) if key == "visits" else float(value)
+            except ValueError:
+                pass
+    return stats or None
+
+
+def record_to_sgf(record):
+    """Return one game as SGF text, with each move's statistics in its comment"""
+    parts = [f"(;GM[1]FF[4]CA[UTF-8]SZ[{record.size}]KM[{record.komi:g}]"
+             f"PB[{_sgf_text(record.black)}]PW[{_sgf_text(record.white)}]RE[{sgf_result(record.result)}]"]
+    for color, move, stats in record.moves:
+        node = f";{SGF_COLORS[color]}[{_sgf_point(move)}]"
+        if stats:
+            node += f"C[{_sgf_text(format_stats(stats))}]"
+        parts.append(node)
+    parts.append(")\n")
+    return "\n".join(parts)
+
+
+class SGFWriter:
+    """Appends games to an SGF collection file one at a time, so nothing but the current game is held"""
+
+    def __init__(self, path, append=True):
+        self.file = open(path, "a" if append else "w", encoding="utf-8")
+        self.games = 0
+
+    def write(self, record):
+        self.file.write(record_to_sgf(record))
+        self.file.flush()
+        self.games += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _split_games(chunks):
+    """
+    Yield the main line of each game tree in a stream of SGF text chunks, as the
+    text of its nodes. Property values are skipped over when counting brackets;
+    in a tree with variations only the first branch at each fork is kept.
+    """
+    depth = 0
+    in_value = False
+    escaped = False
+    collecting = False
+    game = []
+    for chunk in chunks:
+        start = 0
+        skip = 1 if escaped else 0  # Characters before this index are escaped
+        for match in SGF_SPECIAL.finditer(chunk):
+            k = match.start()
+            if k < skip:
+                continue
+            ch = chunk[k]
+            if in_value:
+                if ch == "\\":
+                    skip = k + 2
+                elif ch == "]":
+                    in_value = False
+            elif ch == "[":
+                in_value = True
+            elif ch == "(":
+                if collecting:
+                    game.append(chunk[start:k])
+                depth += 1
+                start = k + 1
+                if depth == 1:
+                    collecting = True
+                    game = []
+            elif ch == ")":
+                if collecting:
+                    game.append(chunk[start:k])
+                    collecting = False  # End of the main line; later branches are skipped
+                depth -= 1
+                start = k + 1
+                if depth == 0 and game:
+                    yield "".join(game)
+                    game = []
+        escaped = skip > len(chunk)
+        if collecting:
+            game.append(chunk[start:])
+
+
+def _read_chunks(file):
+    while True:
+        chunk = file.read(SGF_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _sgf_unescape(value):
+    return re.sub(r"\\(.)", r"\1", value, flags=re.S)
+
+
+def _sgf_nodes(text):
+    """Yield each node of a game's text as {property: [values]}"""
+    node = None
+    for match in SGF_TOKEN.finditer(text):
+        if match.group(0) == ";":
+            if node is not None:
+                yield node
+            node = {}
+        elif node is not None:
+            node[match.group(1).upper()] = [_sgf_unescape(value) for value in SGF_VALUE.findall(match.group(2))]
+    if node is not None:
+        yield node
+
+
+def sgf_to_record(text):
+    """Build a GameRecord from the text of one game's main line (the nodes between its parentheses)"""
+    record = GameRecord()
+    for properties in _sgf_nodes(text):
+        if "SZ" in properties:
+            record.size = int(properties["SZ"][0].split(":")[0])
+        if "KM" in properties:
+            record.komi = float(properties["KM"][0] or 0)
+        if "PB" in properties:
+            record.black = properties["PB"][0]
+        if "PW" in properties:
+            record.white = properties["PW"][0]
+        if "RE" in properties:
+            record.result = parse_sgf_result(properties["RE"][0])
+        for color, name in SGF_COLORS.items():
+            if name in properties:
+                value = properties[name][0]
+                move = None
+                if len(value) == 2 and not (value == "tt" and record.size <= 19):
+                    move = (ord(value[0]) - ord("a"), ord(value[1]) - ord("a"))
+                stats = parse_stats(properties["C"][0]) if "C" in properties else None
+                record.add_move(color, move, stats)
+    return record
+
+
+def read_sgf(path):
+    """Yield a GameRecord for every game in an SGF file, reading it in chunks"""
+    with open(path, encoding="utf-8") as f:
+        for text in _split_games(_read_chunks(f)):
+            yield sgf_to_record(text)
+
+
+# ----------------------------------------------------------------------
+# Binary records
+# ----------------------------------------------------------------------
+
+class RecordWriter:
+    """
+    Appends games to a compact binary record file: a fixed-size header per game
+    and 14 bytes per move including its statistics. Missing statistics are stored
+    as 0 visits and NaN rates.
+    """
+
+    def __init__(self, path, append=True):
+        self.file = open(path, "ab" if append else "wb")
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(RECORD_MAGIC, RECORD_VERSION))
+        self.games = 0
+
+    def write(self, record):
+        result = math.nan if record.result is None else record.result
+        data = [GAME_HEADER.pack(record.size, record.komi, result, len(record.moves))]
+        for color, move, stats in record.moves:
+            point = PASS_POINT if move is None else move[1] * record.size + move[0]
+            if color == WHITE:
+                point |= WHITE_BIT
+            stats = stats or {}
+            data.append(MOVE.pack(point, stats.get("visits") or 0,
+                                  math.nan if stats.get("winrate") is None else stats["winrate"],
+                                  math.nan if stats.get("seconds") is None else stats["seconds"]))
+        self.file.write(b"".join(data))
+        self.file.flush()
+        self.games += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(path, append=True):
+    """An SGFWriter for a .sgf path, otherwise a binary RecordWriter"""
+    if path.lower().endswith(".sgf"):
+        return SGFWriter(path, append)
+    return RecordWriter(path, append)
+
+
+def read_games(path):
+    """Yield the GameRecords of an SGF file or a binary record file, chosen by the extension like open_writer"""
+    return read_sgf(path) if path.lower().endswith(".sgf") else read_records(path)
+
+
+def read_records(path):
+    """Yield a GameRecord for every game in a binary record file, reading one game at a time"""
+    with open(path, "rb") as f:
+        magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+        if magic != RECORD_MAGIC or version != RECORD_VERSION:
+            raise ValueError(f"{path} is not a version {RECORD_VERSION} game record file")
+        while True:
+            header = f.read(GAME_HEADER.size)
+            if len(header) < GAME_HEADER.size:
+                return
+            size, komi, result, count = GAME_HEADER.unpack(header)
+            record = GameRecord(size, komi)
+            record.result = None if math.isnan(result) else result
+            data = f.read(count * MOVE.size)
+            for point, visits, winrate, seconds in MOVE.iter_unpack(data):
+                color = WHITE if point & WHITE_BIT else BLACK
+                point &= ~WHITE_BIT
+                move = None if point == PASS_POINT else (point % size, point // size)
+                stats = {}
+                if visits:
+                    stats["visits"] = visits
+                if not math.isnan(winrate):
+                    stats["winrate"] = winrate
+                if not math.isnan(seconds):
+                    stats["seconds"] = seconds
+                record.add_move(color, move, stats or None)
+            yield record
@@ -0,0 +1,109 @@
+# go_game_renderer.py
+
+import pygame
+from go_game_constants import (BLACK, WHITE, EMPTY, BOARD_PADDING, SIDEBAR_WIDTH, BG_COLOR, LINE_COLOR, BLACK_STONE,
+                               WHITE_STONE, TEXT_COLOR)
+
+SIDEBAR_COLOR = (230, 230, 230)
+BUTTON_COLOR = (180, 180, 180)
+TEXT_CACHE_SIZE = 256  # Rendered text surfaces kept before the cache is emptied
+
+
+class BoardRenderer:
+    """
+    Draws the board and sidebar while touching as few pixels as possible.
+
+    The background with its grid is rendered once to a Surface and each stone
+    color once to a sprite. Every frame the board is compared with what is on
+    screen and only the points that changed are repainted, from the background
+    and the sprites. Sidebar text surfaces are cached by their string and a
+    line is only redrawn when its text changes. draw returns the dirty
+    rectangles, so the caller can pass them to pygame.display.update.
+    """
+
+    def __init__(self, screen, size, cell_size, font):
+        self.screen = screen
+        self.size = size
+        self.cell_size = cell_size
+        self.font = font
+        self.sidebar_x = BOARD_PADDING * 2 + cell_size * size
+
+        # Background and grid, drawn once
+        self.background = pygame.Surface(screen.get_size())
+        self.background.fill(BG_COLOR)
+        end = BOARD_PADDING + (size - 1) * cell_size
+        for i in range(size):
+            offset = BOARD_PADDING + i * cell_size
+            pygame.draw.line(self.background, LINE_COLOR, (offset, BOARD_PADDING), (offset, end))
+            pygame.draw.line(self.background, LINE_COLOR, (BOARD_PADDING, offset), (end, offset))
+
+        # Sidebar panel and pass button are part of the static background too
+        pygame.draw.rect(self.background, SIDEBAR_COLOR,
+                         (self.sidebar_x, 0, SIDEBAR_WIDTH, screen.get_height()))
+        self.pass_button = pygame.Rect(self.sidebar_x + 10, 300, 100, 40)
+        pygame.draw.rect(self.background, BUTTON_COLOR, self.pass_button)
+        text_pass = font.render("Pass", True, (0, 0, 0))
+        self.background.blit(text_pass, (self.pass_button.x + 20, self.pass_button.y + 10))
+
+        # One sprite per stone color
+        radius = cell_size // 2 - 2
+        self.sprites = {}
+        for stone, color in ((BLACK, BLACK_STONE), (WHITE, WHITE_STONE)):
+            sprite = pygame.Surface((cell_size, cell_size), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, color, (cell_size // 2, cell_size // 2), radius)
+            self.sprites[stone] = sprite
+
+        self.text_cache = {}
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget what is on screen so the next draw repaints everything (e.g. after the window was covered)"""
+        self.shown_cells = None
+        self.shown_lines = []
+
+    def point_rect(self, x, y):
+        """The square of screen pixels covered by a stone at (x, y)"""
+        half = self.cell_size // 2
+        return pygame.Rect(BOARD_PADDING + x * self.cell_size - half, BOARD_PADDING + y * self.cell_size - half,
+                           self.cell_size, self.cell_size)
+
+    def render_text(self, text):
+        surface = self.text_cache.get(text)
+        if surface is None:
+            if len(self.text_cache) >= TEXT_CACHE_SIZE:
+                self.text_cache.clear()
+            surface = self.text_cache[text] = self.font.render(text, True, TEXT_COLOR)
+        return surface
+
+    def draw(self, board, info_lines):
+        """
+        Bring the screen up to date with the board (rows of cells) and the
+        sidebar lines, and return the list of rectangles that changed.
+        """
+        dirty = []
+        if self.shown_cells is None:
+            self.screen.blit(self.background, (0, 0))
+            dirty.append(self.screen.get_rect())
+            self.shown_cells = [[EMPTY] * self.size for _ in range(self.size)]
+
+        for y, row in enumerate(board):
+            shown = self.shown_cells[y]
+            for x, stone in enumerate(row):
+                if stone == shown[x]:
+                    continue
+                shown[x] = stone
+                rect = self.point_rect(x, y)
+                self.screen.blit(self.background, rect, rect)
+                if stone != EMPTY:
+                    self.screen.blit(self.sprites[stone], rect)
+                dirty.append(rect)
+
+        for i, line in enumerate(info_lines):
+            if i < len(self.shown_lines) and self.shown_lines[i] == line:
+                continue
+            rect = pygame.Rect(self.sidebar_x, 50 + i * 40, SIDEBAR_WIDTH, 30)
+            self.screen.blit(self.background, rect, rect)
+            self.screen.blit(self.render_text(line), (self.sidebar_x + 10, 50 + i * 40))
+            dirty.append(rect)
+        self.shown_lines = list(info_lines)
+        return dirty
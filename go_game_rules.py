@@ -1,4 +1,8 @@
 from go_game_constants import BOARD_SIZE, EMPTY, BLACK, WHITE
+from go_game_fast_board import FastBoard
+from go_game_geometry import get_board_tables
+from go_game_scoring import score_position
+from go_game_zobrist import hash_board
 
 
 def get_opponent(player):
@@ -6,21 +10,47 @@ def get_opponent(player):
     return BLACK if player == WHITE else WHITE
 
 
-def is_on_board(x, y):
-    """Check if the coordinates (x, y) are on the board."""
-    return 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE
+def is_on_board(x, y, size=BOARD_SIZE):
+    """Check if the coordinates (x, y) are on a board of the given size."""
+    return 0 <= x < size and 0 <= y < size
 
 
-def get_neighbors(x, y):
-    """Get the neighboring coordinates of (x, y) on the board."""
-    return [(nx, ny) for nx, ny in [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)] if is_on_board(nx, ny)]
+def get_neighbors(x, y, size=BOARD_SIZE):
+    """Get the neighboring coordinates of (x, y) from the precomputed table for the board size."""
+    return get_board_tables(size).coord_neighbors[y][x]
+
+
+def get_group(board, x, y):
+    """
+    Flood the group holding the stone at (x, y) on a list board.
+    Returns (stones, has_liberty) with stones as a set of (x, y).
+    """
+    neighbors = get_board_tables(len(board)).coord_neighbors
+    color = board[y][x]
+    stones = {(x, y)}
+    stack = [(x, y)]
+    has_liberty = False
+    while stack:
+        cx, cy = stack.pop()
+        for nx, ny in neighbors[cy][cx]:
+            stone = board[ny][nx]
+            if stone == EMPTY:
+                has_liberty = True
+            elif stone == color and (nx, ny) not in stones:
+                stones.add((nx, ny))
+                stack.append((nx, ny))
+    return stones, has_liberty
 
 
 def has_liberties(board, x, y):
     """Check if a stone at (x, y) has liberties."""
+    if isinstance(board, FastBoard):
+        return board.has_liberties(x, y)
+
     stack = [(x, y)]
     visited = set()
     color = board[y][x]
+    neighbors = get_board_tables(len(board)).coord_neighbors
 
     while stack:
         cx, cy = stack.pop()
@@ -28,7 +58,7 @@ def has_liberties(board, x, y):
             continue
         visited.add((cx, cy))
 
-        for nx, ny in get_neighbors(cx, cy):
+        for nx, ny in neighbors[cy][cx]:
             if board[ny][nx] == EMPTY:
                 return True
             if board[ny][nx] == color and (nx, ny) not in visited:
@@ -38,96 +68,116 @@ def has_liberties(board, x, y):
 
 def remove_dead_stones(board, player):
     """Remove dead stones of the opponent."""
+    if isinstance(board, FastBoard):
+        return []  # A FastBoard removes captures as soon as the stone is placed
+
     opponent = get_opponent(player)
+    size = len(board)
     captured = []
-
-    for y in range(BOARD_SIZE):
-        for x in range(BOARD_SIZE):
-            if board[y][x] == opponent and not has_liberties(board, x, y):
-                board[y][x] = EMPTY
-                captured.append((x, y))
+    seen = set()
+
+    # Flood each opponent group once; find every dead stone first so removing one
+    # stone cannot give the rest of its group a liberty
+    for y in range(size):
+        for x in range(size):
+            if board[y][x] == opponent and (x, y) not in seen:
+                stones, alive = get_group(board, x, y)
+                seen |= stones
+                if not alive:
+                    captured.extend(stones)
+    for x, y in captured:
+        board[y][x] = EMPTY
     return captured
 
 
 def is_suicide(board, x, y, player):
     """Check if placing a stone at (x, y) is a suicide move."""
-    board[y][x] = player  # Temporarily place the stone
-    captured = remove_dead_stones(board, player)
+    if isinstance(board, FastBoard):
+        return board.is_suicide(x, y, player)
 
-    is_suicide_move = not has_liberties(board, x, y)
+    # Only the groups next to the stone can change, so the rest of the board is not scanned
+    opponent = get_opponent(player)
+    board[y][x] = player  # Temporarily place the stone
+    is_suicide_move = True
+    for nx, ny in get_neighbors(x, y, len(board)):
+        if board[ny][nx] == EMPTY:
+            is_suicide_move = False  # The stone has a liberty
+            break
+        if board[ny][nx] == opponent and not get_group(board, nx, ny)[1]:
+            is_suicide_move = False  # The move captures this group
+            break
+    if is_suicide_move:
+        is_suicide_move = not get_group(board, x, y)[1]
+    board[y][x] = EMPTY  # Undo the move
+    return is_suicide_move
 
-    # Restore the captured stones (undo the move)
-    for cx, cy in captured:
-        board[cy][cx] = get_opponent(player)  # Reset opponent's stones
 
-    # Restore the position of the placed stone to empty
-    board[y][x] = EMPTY
+def generate_legal_moves(board, player):
+    """
+    Return all legal (x, y) moves for the player without copying the board.
 
-    return is_suicide_move
+    A point with an empty neighbour can never be suicide, so only points that are
+    completely surrounded fall back to the full is_suicide check, which places and
+    removes the stone in place.
+    """
+    if isinstance(board, FastBoard):
+        return board.legal_moves(player)
+
+    size = len(board)
+    neighbors = get_board_tables(size).coord_neighbors
+    legal_moves = []
+    for y in range(size):
+        for x in range(size):
+            if board[y][x] != EMPTY:
+                continue
+            if any(board[ny][nx] == EMPTY for nx, ny in neighbors[y][x]):
+                legal_moves.append((x, y))
+            elif not is_suicide(board, x, y, player):
+                legal_moves.append((x, y))
+    return legal_moves
 
 
 def is_ko(previous_board, current_board):
     """Check if the current board state is the same as the previous one (Ko rule)."""
-    for y in range(BOARD_SIZE):
-        for x in range(BOARD_SIZE):
+    if isinstance(previous_board, FastBoard) and isinstance(current_board, FastBoard):
+        return previous_board.hash == current_board.hash
+
+    for y in range(len(current_board)):
+        for x in range(len(current_board)):
             if previous_board[y][x] != current_board[y][x]:
                 return False
     return True
 
 
-def count_captured_stones(board, player):
-    """Count the number of captured stones for a player."""
-    captured = 0
-    for row in board:
-        captured += row.count(player)
-    return captured
-
+def position_hash(board):
+    """Return the Zobrist hash of the position, incremental on a FastBoard and computed for a list board."""
+    if isinstance(board, FastBoard):
+        return board.hash
+    return hash_board(board)
 
-def count_territory(board, player):
-    """Count the territory (empty points surrounded by the player's stones)."""
-    territory = 0
-    for y in range(BOARD_SIZE):
-        for x in range(BOARD_SIZE):
-            if board[y][x] == EMPTY and is_surrounded_by(board, player, x, y):
-                territory += 1
-    return territory
 
-
-def is_surrounded_by(board, player, x, y):
-    """Checks if an empty space at (x, y) is surrounded by the player's stones."""
-    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-        nx, ny = x + dx, y + dy
-        if 0 <= nx < BOARD_SIZE and 0 <= ny < BOARD_SIZE:
-            if board[ny][nx] != player and board[ny][nx] != EMPTY:
-                return False
-    return True
+def is_superko(board, x, y, player):
+    """
+    Check if placing a stone at (x, y) would repeat any earlier position (positional superko).
+    Only a FastBoard keeps the position history, so a list board raises TypeError
+    rather than passing every move as not repeating.
+    """
+    if not isinstance(board, FastBoard):
+        raise TypeError("positional superko needs a FastBoard, which keeps the position history")
+    return board.is_superko(x, y, player)
 
 
 def calculate_score(board, komi=6.5):
     """
-    Calculate the score based on territory, captured stones, and komi.
+    Calculate the Tromp-Taylor area score: each player's stones plus the empty
+    regions that only touch that player's stones. Each empty region is flood-filled
+    once and the result is cached by position hash (see go_game_scoring).
 
     :param board: The current game board
     :param komi: The komi value for white player, default is 6.5
     :return: A tuple (black_score, white_score)
     """
-    black_score = 0
-    white_score = komi  # White gets komi
-
-    # Count captured stones
-    black_captured = count_captured_stones(board, BLACK)
-    white_captured = count_captured_stones(board, WHITE)
-    black_score += black_captured
-    white_score += white_captured
-
-    # Count territory (surrounded empty spaces)
-    black_territory = count_territory(board, BLACK)
-    white_territory = count_territory(board, WHITE)
-
-    black_score += black_territory
-    white_score += white_territory
-
-    return black_score, white_score
+    return score_position(board, komi)
 
 # In go_game_rules.py
 def check_end_game(pass_history):
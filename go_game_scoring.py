@@ -0,0 +1,199 @@
+# go_game_scoring.py
+
+from collections import OrderedDict
+from go_game_constants import EMPTY, BLACK, WHITE
+from go_game_fast_board import FastBoard
+from go_game_geometry import get_board_tables
+from go_game_zobrist import hash_board
+
+# Positions whose score is remembered by calculate_score
+SCORE_CACHE_SIZE = 4096
+
+# Bits of the colors an empty region touches
+REACHES_BLACK = 1 << BLACK
+REACHES_WHITE = 1 << WHITE
+
+_score_cache = OrderedDict()
+
+
+def area_counts(cells, points, neighbors):
+    """
+    Tromp-Taylor area: every stone counts for its color, and an empty region
+    counts for a color when all the stones it touches are of that color.
+    Works on the padded cell array of a FastBoard (or one built by padded_cells),
+    flooding each empty region exactly once. Returns (black_area, white_area).
+    """
+    black = white = 0
+    seen = bytearray(len(cells))
+    for i in points:
+        stone = cells[i]
+        if stone == BLACK:
+            black += 1
+        elif stone == WHITE:
+            white += 1
+        elif not seen[i]:
+            seen[i] = 1
+            stack = [i]
+            size = 0
+            reaches = 0
+            while stack:
+                p = stack.pop()
+                size += 1
+                for n in neighbors[p]:
+                    c = cells[n]
+                    if c == EMPTY:
+                        if not seen[n]:
+                            seen[n] = 1
+                            stack.append(n)
+                    else:
+                        reaches |= 1 << c
+            if reaches == REACHES_BLACK:
+                black += size
+            elif reaches == REACHES_WHITE:
+                white += size
+    return black, white
+
+
+def padded_cells(board):
+    """Return (cells, points, neighbors) in the padded FastBoard layout for a list-of-lists board."""
+    tables = get_board_tables(len(board))
+    cells = tables.cells[:]
+    points = tables.points
+    k = 0
+    for row in board:
+        for stone in row:
+            cells[points[k]] = stone
+            k += 1
+    return cells, points, tables.neighbors
+
+
+def score_position(board, komi=6.5):
+    """
+    Return the Tromp-Taylor (black_score, white_score) of a FastBoard or a
+    list-of-lists board, with komi added to white. Results are cached by board
+    size and Zobrist hash, so scoring an unchanged position again is a lookup.
+    """
+    fast = isinstance(board, FastBoard)
+    if fast:
+        key = (board.size, board.hash)
+    else:
+        key = (len(board), hash_board(board))
+    counts = _score_cache.get(key)
+    if counts is None:
+        if fast:
+            counts = area_counts(board.cells, board.points, board.neighbors)
+        else:
+            counts = area_counts(*padded_cells(board))
+        _score_cache[key] = counts
+        if len(_score_cache) > SCORE_CACHE_SIZE:
+            _score_cache.popitem(last=False)
+    else:
+        _score_cache.move_to_end(key)
+    black, white = counts
+    return black, white + komi
+
+
+class AreaScorer:
+    """
+    Keeps the Tromp-Taylor area of one FastBoard up to date move by move.
+
+    Every empty point is labelled with its region, and each region keeps its
+    points and the colors it touches. After a move only the region the stone was
+    played in and the regions next to captured stones are flooded again; every
+    other region keeps its label and its owner.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.reset()
+
+    def reset(self):
+        """Label every region of the board from scratch"""
+        board = self.board
+        self.region_of = [0] * len(board.cells)  # region id of each empty point, 0 for stones
+        self.regions = {}  # region id -> (points, reaches)
+        self.next_id = 1
+        self.stones = {BLACK: 0, WHITE: 0}
+        self.territory = {BLACK: 0, WHITE: 0}
+        for i in board.points:
+            stone = board.cells[i]
+            if stone != EMPTY:
+                self.stones[stone] += 1
+        self._flood(board.points)
+        self.hash = board.hash
+
+    def _flood(self, starts):
+        """Label the unlabelled empty points reachable from starts as new regions"""
+        cells = self.board.cells
+        neighbors = self.board.neighbors
+        region_of = self.region_of
+        for i in starts:
+            if cells[i] != EMPTY or region_of[i]:
+                continue
+            rid = self.next_id
+            self.next_id += 1
+            region_of[i] = rid
+            stack = [i]
+            points = []
+            reaches = 0
+            while stack:
+                p = stack.pop()
+                points.append(p)
+                for n in neighbors[p]:
+                    c = cells[n]
+                    if c == EMPTY:
+                        if not region_of[n]:
+                            region_of[n] = rid
+                            stack.append(n)
+                    else:
+                        reaches |= 1 << c
+            self.regions[rid] = (points, reaches)
+            self._count(points, reaches, 1)
+
+    def _count(self, points, reaches, sign):
+        if reaches == REACHES_BLACK:
+            self.territory[BLACK] += sign * len(points)
+        elif reaches == REACHES_WHITE:
+            self.territory[WHITE] += sign * len(points)
+
+    def update(self, move, captured):
+        """
+        Account for a stone just placed at index move that captured the given
+        indices. Falls back to a full reset if the board changed in some other way.
+        """
+        board = self.board
+        cells = board.cells
+        color = cells[move]
+        if color == EMPTY or not self.region_of[move]:
+            self.reset()
+            return
+        self.stones[color] += 1
+        self.stones[BLACK + WHITE - color] -= len(captured)
+
+        # The move's region splits, and regions next to captured stones merge with them
+        affected = {self.region_of[move]}
+        for s in captured:
+            for n in board.neighbors[s]:
+                if self.region_of[n]:
+                    affected.add(self.region_of[n])
+        starts = list(captured)
+        for rid in affected:
+            points, reaches = self.regions.pop(rid)
+            self._count(points, reaches, -1)
+            for p in points:
+                self.region_of[p] = 0
+            starts.extend(points)
+        self._flood(starts)
+        self.hash = board.hash
+
+    def counts(self):
+        """Return (black_area, white_area), rebuilding first if the board no longer matches"""
+        if self.hash != self.board.hash:
+            self.reset()
+        return (self.stones[BLACK] + self.territory[BLACK],
+                self.stones[WHITE] + self.territory[WHITE])
+
+    def score(self, komi=6.5):
+        """Return (black_score, white_score) with komi added to white"""
+        black, white = self.counts()
+        return black, white + komi
@@ -0,0 +1,224 @@
+# go_game_solver.py
+
+import time
+from go_game_constants import EMPTY, BLACK, WHITE
+from go_game_playout import is_eye
+from go_game_priors import ordered_indices
+from go_game_scoring import area_counts
+
+# Positions with at most this many empty points are solved exactly instead of played out
+SOLVER_EMPTY_POINTS = 8
+# Nodes one solve may visit by default before it gives up
+DEFAULT_SOLVER_NODES = 2000
+# Search leaves are solved only when smaller and cheaper than that, since a search reaches thousands of them
+LEAF_SOLVER_EMPTY_POINTS = 5
+LEAF_SOLVER_NODES = 300
+# Positions kept in the solver's transposition table before it is emptied
+SOLVER_TABLE_SIZE = 500000
+
+# A capture that opens the board beyond max_empty plus this many empty points ends the search there
+SOLVER_HORIZON_MARGIN = 4
+# Self-ataris of more stones than this are not searched (a lone stone may still be thrown in)
+MAX_SELF_ATARI_STONES = 1
+
+# Nodes searched between looks at the clock when a solve has a deadline
+DEADLINE_CHECK_NODES = 256
+
+# Kinds of stored values: exact, or a lower or upper bound from an alpha-beta cutoff
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SolverBudgetExceeded(Exception):
+    """A solve visited more nodes than it was allowed, or ran past its deadline"""
+
+
+def empty_points(board):
+    """Number of empty points on a FastBoard"""
+    cells = board.cells
+    return sum(1 for i in board.points if cells[i] == EMPTY)
+
+
+def self_atari_stones(board, i, color):
+    """Stones color would leave in atari by playing at the empty index i: 0 if it captures or keeps two liberties"""
+    cells = board.cells
+    group_of = board.group_of
+    group_libs = board.group_libs
+    libs = set()
+    seen = []
+    stones = 1
+    for n in board.neighbors[i]:
+        stone = cells[n]
+        if stone == EMPTY:
+            libs.add(n)
+        elif stone == color:
+            gid = group_of[n]
+            if gid not in seen:
+                seen.append(gid)
+                stones += len(board.group_stones[gid])
+                libs.update(group_libs[gid])
+        elif len(group_libs[group_of[n]]) == 1:
+            return 0
+    libs.discard(i)
+    return stones if len(libs) < 2 else 0
+
+
+class EndgameSolver:
+    """
+    Exact negamax search with alpha-beta pruning for positions with few empty
+    points, finding the move that maximises the final Tromp-Taylor score.
+
+    The game ends after two passes in a row. Every legal move (superko
+    included) and the pass are tried, except two kinds of self-destruction that
+    reopen the board and make the tree explode: as in the playouts a player never
+    fills its own single-point eye, and never puts more than
+    MAX_SELF_ATARI_STONES stones in atari without capturing. A capture that
+    leaves more than max_empty + SOLVER_HORIZON_MARGIN empty points is scored as
+    the position stands, the area of the captured stones going to the capturer;
+    the value is exact whenever no line of play captures that much.
+    Moves are ordered
+    with the transposition table's best move first, then by the priors of go_game_priors, which puts
+    captures and atari escapes early. The table maps (hash, player to move,
+    passes) to a value and its bound, and is kept across solves, so a search
+    that calls the solver at many leaves reuses the positions already proven.
+    Entries ignore the superko history of the path that reached them.
+    """
+
+    def __init__(self, komi=6.5, max_empty=SOLVER_EMPTY_POINTS, max_nodes=DEFAULT_SOLVER_NODES,
+                 leaf_empty=LEAF_SOLVER_EMPTY_POINTS, leaf_nodes=LEAF_SOLVER_NODES):
+        self.komi = komi
+        self.max_empty = max_empty
+        self.max_nodes = max_nodes
+        self.leaf_empty = leaf_empty  # solve_leaf limits; leaf_empty=0 keeps the solver out of the search
+        self.leaf_nodes = leaf_nodes
+        self.table = {}
+        # (hash, player, passes) -> largest node budget a solve of the position ran out of, so it is not retried
+        self.failures = {}
+        self.nodes = 0
+        self.limit = 0
+        self.deadline = None
+        self.horizon = 0
+        self.solved = 0
+        self.failed = 0
+        self.skipped = 0  # Solves not tried because the position already failed with at least that budget
+
+    def can_solve(self, board):
+        return empty_points(board) <= self.max_empty
+
+    def clear(self):
+        """Forget every stored value and failure, e.g. after the komi changed"""
+        self.table.clear()
+        self.failures.clear()
+
+    def solve(self, board, player, passes=0, max_nodes=None, deadline=None):
+        """
+        Return (value, move) for player to move on a FastBoard after passes
+        passes in a row: the final score difference (player minus opponent, komi
+        included) under best play and a move that reaches it (None is a pass).
+        Returns None when the position needs more than max_nodes nodes, or when
+        time.time() passes deadline first.
+        """
+        if deadline is not None and time.time() >= deadline:
+            return None
+        if len(self.table) > SOLVER_TABLE_SIZE:
+            self.clear()
+        self.limit = self.max_nodes if max_nodes is None else max_nodes
+        key = (board.hash, player, passes)
+        if self.failures.get(key, -1) >= self.limit:
+            self.skipped += 1
+            return None
+        self.nodes = 0
+        self.deadline = deadline
+        self.horizon = max(self.max_empty, empty_points(board)) + SOLVER_HORIZON_MARGIN
+        bound = len(board.points) + abs(self.komi) + 1
+        try:
+            value, move = self._negamax(board, player, passes, -bound, bound, empty_points(board))
+        except SolverBudgetExceeded:
+            self.failed += 1
+            if self.nodes > self.limit:
+                # Out of nodes rather than time: the same budget would fail again
+                self.failures[key] = max(self.limit, self.failures.get(key, -1))
+            return None
+        self.solved += 1
+        return value, move
+
+    def solve_leaf(self, board, player, deadline=None):
+        """
+        Solve a search leaf with player to move within the leaf limits. Returns the
+        proven result for the player who moved into the leaf, as a rollout would
+        (1 for a win, 0 for a loss, 0.5 for a draw), or None if it was not solved.
+        """
+        if empty_points(board) > self.leaf_empty:
+            return None
+        solved = self.solve(board, player, max_nodes=self.leaf_nodes, deadline=deadline)
+        if solved is None:
+            return None
+        value = solved[0]  # From the point of view of player
+        return 0 if value > 0 else 1 if value < 0 else 0.5
+
+    def _score(self, board, player):
+        black, white = area_counts(board.cells, board.points, board.neighbors)
+        score = black - white - self.komi
+        return score if player == BLACK else -score
+
+    def _negamax(self, board, player, passes, alpha, beta, empty):
+        if passes >= 2 or empty > self.horizon:
+            return self._score(board, player), None
+        self.nodes += 1
+        if self.nodes > self.limit:
+            raise SolverBudgetExceeded()
+        if self.deadline is not None and not self.nodes % DEADLINE_CHECK_NODES and time.time() >= self.deadline:
+            raise SolverBudgetExceeded()
+
+        key = (board.hash, player, passes)
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            flag, value, best_move = entry
+            if flag == EXACT:
+                return value, best_move
+            if flag == LOWER and value >= beta:
+                return value, best_move
+            if flag == UPPER and value <= alpha:
+                return value, best_move
+
+        moves = [i for i in ordered_indices(board, player)
+                 if not is_eye(board, i, player) and self_atari_stones(board, i, player) <= MAX_SELF_ATARI_STONES]
+        if best_move is not None and best_move in moves:
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+        # Passing right after the opponent passed ends the game, which bounds the search quickly
+        moves.insert(0 if passes else len(moves), None)
+
+        opponent = BLACK if player == WHITE else WHITE
+        original_alpha = alpha
+        best_value = None
+        for i in moves:
+            if i is None:
+                value = -self._negamax(board, opponent, passes + 1, -beta, -alpha, empty)[0]
+            else:
+                child = board.copy()
+                captured = child.play_index(i, player)
+                value = -self._negamax(child, opponent, 0, -beta, -alpha, empty - 1 + len(captured))[0]
+            if best_value is None or value > best_value:
+                best_value, best_move = value, i
+            if value > alpha:
+                alpha = value
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (flag, best_value, best_move)
+        return best_value, best_move
+
+    def best_move(self, board, player, max_nodes=None, deadline=None):
+        """Return ((x, y) or None to pass, value) for a FastBoard position, or None if it could not be solved"""
+        result = self.solve(board, player, max_nodes=max_nodes, deadline=deadline)
+        if result is None:
+            return None
+        value, i = result
+        return (None if i is None else board.coords(i)), value
@@ -0,0 +1,79 @@
+# go_game_state.py
+
+from go_game_constants import BOARD_SIZE, BLACK, WHITE
+from go_game_fast_board import FastBoard
+from go_game_records import GameRecord
+from go_game_rules import check_end_game
+from go_game_scoring import AreaScorer
+
+
+class GoGame:
+    """
+    One game at any board size: the board, the player to move, the pass history
+    and the komi. The GUI, the arena and the AI all work from this object, so
+    nothing depends on the BOARD_SIZE constant beyond the default.
+    """
+
+    def __init__(self, size=BOARD_SIZE, komi=6.5):
+        self.size = size
+        self.komi = komi
+        self.board = FastBoard(size)
+        self.scorer = AreaScorer(self.board)  # Area kept up to date after every move
+        self.current_player = BLACK
+        self.pass_history = []
+        self.moves = []  # (player, (x, y) or None for a pass) in the order played
+        self.record = GameRecord(size, komi)  # The same moves with their search statistics, for SGF or binary logs
+
+    def is_on_board(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size
+
+    def legal_moves(self, player=None):
+        """Return the legal (x, y) moves for player, default the player to move"""
+        return self.board.legal_moves(player or self.current_player)
+
+    def play(self, x, y, stats=None):
+        """
+        Place a stone for the player to move and pass the turn.
+        Returns (success, captured) like place_stone; an illegal move changes nothing.
+        stats are the search statistics of the move, kept in the game record.
+        """
+        valid, captured = self.board.place_stone(x, y, self.current_player)
+        if valid:
+            self.scorer.update(self.board.index(x, y), [self.board.index(cx, cy) for cx, cy in captured])
+            self.pass_history.append(False)
+            self.moves.append((self.current_player, (x, y)))
+            self.record.add_move(self.current_player, (x, y), stats)
+            self.current_player = WHITE if self.current_player == BLACK else BLACK
+        return valid, captured
+
+    def pass_move(self, stats=None):
+        """The player to move passes"""
+        self.pass_history.append(True)
+        self.moves.append((self.current_player, None))
+        self.record.add_move(self.current_player, None, stats)
+        self.current_player = WHITE if self.current_player == BLACK else BLACK
+
+    def is_over(self):
+        """True once both players passed in a row"""
+        return check_end_game(self.pass_history)
+
+    def score(self):
+        """Return the Tromp-Taylor (black_score, white_score) with the game's komi"""
+        return self.scorer.score(self.komi)
+
+    def finish_record(self, black="Black", white="White"):
+        """Return the game record with the player names and the current score as its result"""
+        black_score, white_score = self.score()
+        self.record.black = black
+        self.record.white = white
+        self.record.result = black_score - white_score
+        return self.record
+
+    def winner(self):
+        """BLACK, WHITE, or None for a draw, by the current score"""
+        black_score, white_score = self.score()
+        if black_score > white_score:
+            return BLACK
+        if white_score > black_score:
+            return WHITE
+        return None
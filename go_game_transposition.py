@@ -0,0 +1,62 @@
+# go_game_transposition.py
+
+from collections import OrderedDict
+
+# Every stored node keeps its board, child lists and untried moves alive: about 6.5 KB on 7x7
+NODE_BYTES = 6500
+# Memory the nodes a default table keeps alive may take
+TABLE_MEMORY_BYTES = 256 * 1024 * 1024
+# Default number of positions kept in a table
+DEFAULT_TABLE_SIZE = TABLE_MEMORY_BYTES // NODE_BYTES
+
+
+class TranspositionTable:
+    """
+    Maps (position hash, player to move) to the MCTSNode searching that position,
+    so move orders that reach the same position share one node, its statistics and
+    its children, turning the search tree into a DAG.
+
+    The table holds at most max_entries positions and evicts the least recently
+    used one when full. An evicted node stays in the tree through its parents; it
+    just stops being found for new transpositions.
+    """
+
+    def __init__(self, max_entries=DEFAULT_TABLE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Return the node stored for key (marking it recently used), or None."""
+        node = self.entries.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return node
+
+    def put(self, key, node):
+        """Store a node for key, evicting the least recently used entry when full."""
+        self.entries[key] = node
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def retain(self, nodes):
+        """
+        Drop every entry whose node is not among nodes (e.g. the subtree kept when
+        a search tree is reused), so the rest of the old tree can be freed.
+        """
+        keep = {id(node) for node in nodes}
+        for key in [key for key, node in self.entries.items() if id(node) not in keep]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,38 @@
+# go_game_zobrist.py
+
+import random
+from go_game_constants import BOARD_SIZE, BLACK, WHITE
+
+# Fixed seed so hashes are identical between runs and processes
+ZOBRIST_SEED = 0x5EED60
+
+_tables = {}
+
+
+def get_zobrist_table(size=BOARD_SIZE):
+    """
+    Return the Zobrist keys for a board size, indexed as table[color][index]
+    with the padded FastBoard indices. table[EMPTY] is all zeros.
+    """
+    table = _tables.get(size)
+    if table is None:
+        rng = random.Random(ZOBRIST_SEED + size)
+        length = (size + 2) * (size + 1) + 1
+        table = [[0] * length,
+                 [rng.getrandbits(64) for _ in range(length)],
+                 [rng.getrandbits(64) for _ in range(length)]]
+        _tables[size] = table
+    return table
+
+
+def hash_board(board):
+    """Compute the 64-bit Zobrist hash of a list-of-lists board from scratch."""
+    size = len(board)
+    table = get_zobrist_table(size)
+    stride = size + 1
+    h = 0
+    for y, row in enumerate(board):
+        for x, stone in enumerate(row):
+            if stone == BLACK or stone == WHITE:
+                h ^= table[stone][(y + 1) * stride + x + 1]
+    return h